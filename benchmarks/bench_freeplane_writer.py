@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Compare the streaming Freeplane writer with the old ElementTree + minidom round trip."""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from xml.dom import minidom
+from xml.etree.ElementTree import Element, tostring
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+from course_creation_tools.convert_yaml_to_freeplane import add_node_recursive, write_mind_map
+from workloads import generate_mind_map
+
+
+def minidom_round_trip(data):
+    map_elem = Element('map', {'version': '1.9.13'})
+    add_node_recursive(map_elem, data['root'])
+    return minidom.parseString(tostring(map_elem, 'utf-8')).toprettyxml(indent="    ")
+
+
+def streaming(data):
+    with open(os.devnull, 'w', encoding='utf-8') as out:
+        write_mind_map(data, out)
+
+
+def measure(function, data):
+    """Return wall time and, from a second traced run, peak extra memory in bytes."""
+    start = time.perf_counter()
+    function(data)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--nodes', type=int, default=100_000, help='Number of nodes in the generated map')
+    args = parser.parse_args()
+
+    data = generate_mind_map(args.nodes)
+    old_time, old_peak = measure(minidom_round_trip, data)
+    new_time, new_peak = measure(streaming, data)
+    print(f"{args.nodes:,} nodes")
+    print(f"ElementTree + minidom: {old_time:.2f}s, peak {old_peak / 2**20:.1f} MB")
+    print(f"Streaming writer:      {new_time:.2f}s, peak {new_peak / 2**20:.1f} MB")
+    print(f"Speedup: {old_time / new_time:.1f}x")
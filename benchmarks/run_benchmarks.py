@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""Time the knowledge graph, mind map and animation tools on synthetic workloads.
+
+Results are written as JSON. Given a baseline from an earlier run, any benchmark that got slower
+than the threshold allows is reported and the script exits with status 1.
+"""
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+sys.path.insert(0, str(ROOT))
+import workloads
+
+DEFAULT_SIZES = (10, 100, 1_000, 10_000)
+MIND_MAP_SIZES = {'wide': 10_000, 'deep': 100, 'balanced': 20_000}
+
+
+class Skip(Exception):
+    """Raised by a benchmark's setup when something it needs is not installed."""
+
+
+def require_module(name):
+    if importlib.util.find_spec(name) is None:
+        raise Skip(f"the {name} package is not installed")
+
+
+def require_program(name):
+    if shutil.which(name) is None:
+        raise Skip(f"{name} is not on PATH")
+
+
+def parse_every_time(cleanup):
+    """Switch off the compiled YAML cache until the benchmark is done, so every run parses the YAML."""
+    from course_creation_tools import yaml_cache
+    previous = os.environ.get(yaml_cache.ENV_VAR)
+    os.environ[yaml_cache.ENV_VAR] = '0'
+    if previous is None:
+        cleanup.callback(os.environ.pop, yaml_cache.ENV_VAR, None)
+    else:
+        cleanup.callback(os.environ.__setitem__, yaml_cache.ENV_VAR, previous)
+
+
+def knowledge_graph_benchmark(entities, edges_per_entity, extra_formats=()):
+    def setup(work_dir, cleanup):
+        require_module('graphviz')
+        require_program('dot')
+        from knowledge_graph_visualizer import create_knowledge_graph
+        parse_every_time(cleanup)
+        yaml_file = workloads.write_knowledge_graph(work_dir / 'graph.yaml', entities, edges_per_entity)
+        return lambda: create_knowledge_graph(yaml_file, work_dir / 'output', extra_formats=extra_formats)
+    return setup
+
+
+def inline_html_benchmark(entities, edges_per_entity):
+    def setup(work_dir, cleanup):
+        require_module('graphviz')
+        from knowledge_graph_visualizer import create_inline_html
+        svg_file = work_dir / 'graph.svg'
+        svg_file.write_text(workloads.graph_svg(entities, edges_per_entity), encoding='utf-8')
+        return lambda: create_inline_html(svg_file, work_dir)
+    return setup
+
+
+def mind_map_benchmark(data, cached=False):
+    """convert_yaml_file on a generated map; with cached, from the compiled YAML cache of an earlier run."""
+    def setup(work_dir, cleanup):
+        from course_creation_tools.convert_yaml_to_freeplane import convert_yaml_file
+        yaml_file = work_dir / 'outline.yaml'
+        yaml_file.write_text(workloads.mind_map_yaml(data()), encoding='utf-8')
+        if cached:
+            convert_yaml_file(yaml_file, work_dir / 'outline.mm')
+        else:
+            parse_every_time(cleanup)
+        return lambda: convert_yaml_file(yaml_file, work_dir / 'outline.mm')
+    return setup
+
+
+def capture_benchmark(fps=30, duration=1):
+    def setup(work_dir, cleanup):
+        require_module('selenium')
+        require_program('ffmpeg')
+        sys.path.insert(0, str(ROOT / 'brain_animation'))
+        from capture_animation import capture_animation, start_driver
+        from browser_pool import BrowserPool
+        # One warm browser for every run, so the timings measure capture and not Chrome starting
+        pool = cleanup.enter_context(BrowserPool(start_driver, size=1))
+        try:
+            pool.release(pool.acquire())
+        except Exception as e:
+            raise Skip(f"Chrome could not be started: {e}")
+        url = workloads.write_animation_page(work_dir / 'animation.html', duration).as_uri()
+        return lambda: capture_animation(url, str(work_dir / 'animation.mp4'), fps, duration, pool=pool)
+    return setup
+
+
+def benchmarks(sizes):
+    """Return {name: setup} for every benchmark. setup(work_dir, cleanup) prepares the input and returns
+    the function to time, or raises Skip. cleanup is an ExitStack closed once the benchmark is done."""
+    registry = {}
+    for entities in sizes:
+        for density in workloads.EDGE_DENSITIES:
+            registry[f'create_knowledge_graph[{entities}x{density}]'] = knowledge_graph_benchmark(entities, density)
+            registry[f'create_inline_html[{entities}x{density}]'] = inline_html_benchmark(entities, density)
+        registry[f'create_knowledge_graph[{entities}x1-svg+png+pdf]'] = knowledge_graph_benchmark(
+            entities, 1, ('png', 'pdf'))
+    registry[f"convert_yaml_file[wide-{MIND_MAP_SIZES['wide']}]"] = mind_map_benchmark(
+        lambda: workloads.wide_mind_map(MIND_MAP_SIZES['wide']))
+    registry[f"convert_yaml_file[deep-{MIND_MAP_SIZES['deep']}]"] = mind_map_benchmark(
+        lambda: workloads.deep_mind_map(MIND_MAP_SIZES['deep']))
+    registry[f"convert_yaml_file[balanced-{MIND_MAP_SIZES['balanced']}]"] = mind_map_benchmark(
+        lambda: workloads.generate_mind_map(MIND_MAP_SIZES['balanced']))
+    registry[f"convert_yaml_file[balanced-{MIND_MAP_SIZES['balanced']}-cached]"] = mind_map_benchmark(
+        lambda: workloads.generate_mind_map(MIND_MAP_SIZES['balanced']), cached=True)
+    registry['capture_animation[30fps-1s]'] = capture_benchmark()
+    return registry
+
+
+def time_function(function, repeat):
+    """Call function repeat times and return the wall time of each call in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run(selected, repeat):
+    results = {}
+    for name, setup in selected.items():
+        with tempfile.TemporaryDirectory() as work_dir, contextlib.ExitStack() as cleanup:
+            try:
+                function = setup(Path(work_dir), cleanup)
+            except Skip as e:
+                results[name] = {'skipped': str(e)}
+                print(f"{name}: skipped, {e}")
+                continue
+            times = time_function(function, repeat)
+        results[name] = {'median': statistics.median(times), 'min': min(times), 'repeat': repeat}
+        print(f"{name}: {results[name]['median']:.4f}s (min {results[name]['min']:.4f}s)")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return (name, baseline seconds, new seconds) for each benchmark whose median grew by more than threshold,
+    a fraction of the baseline. Benchmarks skipped in either run are not compared."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name, {})
+        if 'median' not in result or 'median' not in before:
+            continue
+        if result['median'] > before['median'] * (1 + threshold):
+            regressions.append((name, before['median'], result['median']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', dest='pattern', default='',
+                        help='Only run benchmarks whose name contains this text')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='Comma separated knowledge graph entity counts (default: %(default)s; '
+                             f"the full range is {','.join(map(str, workloads.GRAPH_SIZES))})")
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per benchmark; the median is kept (default: 3)')
+    parser.add_argument('-o', '--output', default='benchmark-results.json',
+                        help='Write results to this JSON file (default: benchmark-results.json)')
+    parser.add_argument('--baseline', help='Compare against results saved from an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Slowdown allowed before a benchmark counts as a regression (default: 0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    selected = {name: setup for name, setup in benchmarks(sizes).items() if args.pattern in name}
+    results = run(selected, args.repeat)
+    report = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))['results']
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before:.4f}s -> {after:.4f}s (+{after / before - 1:.0%})")
+        if regressions:
+            return 1
+        print(f"No regressions over {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
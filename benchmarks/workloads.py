@@ -0,0 +1,142 @@
+"""Synthetic inputs for the benchmarks: knowledge graphs, mind maps and an animation page."""
+import random
+from pathlib import Path
+
+import yaml
+
+# Entity counts for the knowledge graph benchmarks; laying out 100k entities with dot takes a long time
+GRAPH_SIZES = (10, 100, 1_000, 10_000, 100_000)
+# Average number of relationships per entity, sparse and dense
+EDGE_DENSITIES = (1, 4)
+
+
+def knowledge_graph(entities, edges_per_entity=1, seed=0):
+    """Return a knowledge graph dict with the given number of entities and about edges_per_entity * entities
+    relationships between random pairs. The same arguments always give the same graph."""
+    rng = random.Random(seed)
+    data = {
+        'entities': [
+            {'id': f'e{index}', 'name': f'Entity {index}', 'description': f'Generated entity number {index}'}
+            for index in range(entities)
+        ],
+        'relationships': [],
+    }
+    if entities > 1:
+        for _ in range(round(entities * edges_per_entity)):
+            source, target = rng.sample(range(entities), 2)
+            data['relationships'].append({'source': f'e{source}', 'target': f'e{target}', 'name': 'relates to'})
+    return data
+
+
+def write_knowledge_graph(path, entities, edges_per_entity=1, seed=0):
+    dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.dump(knowledge_graph(entities, edges_per_entity, seed), f, Dumper=dumper, sort_keys=False)
+    return Path(path)
+
+
+def graph_svg(entities, edges_per_entity=1):
+    """Return an SVG shaped like dot's output for a graph of this size, for benchmarks that only read SVG."""
+    parts = ['<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n',
+             f'<svg width="{entities * 40}pt" height="400pt" xmlns="http://www.w3.org/2000/svg">\n',
+             '<g id="graph0" class="graph">\n']
+    for index in range(entities):
+        parts.append(f'<g id="node{index + 1}" class="node"><title>e{index}</title>'
+                     f'<ellipse fill="lightblue" stroke="black" cx="{index * 40}" cy="-18" rx="27" ry="18"/>'
+                     f'<text text-anchor="middle" x="{index * 40}" y="-14.3">Entity {index}</text></g>\n')
+    for index in range(round(entities * edges_per_entity)):
+        parts.append(f'<g id="edge{index + 1}" class="edge"><title>e{index % entities}&#45;&gt;e0</title>'
+                     f'<path fill="none" stroke="black" d="M{index},-36C{index},-60 0,-60 0,-36"/></g>\n')
+    parts.append('</g>\n</svg>\n')
+    return ''.join(parts)
+
+
+def generate_mind_map(node_count, branching=10):
+    """Build a mind map with node_count nodes, breadth first, each node having a note."""
+    root = {'title': 'Generated course', 'note': 'Root note', 'children': {}}
+    queue = [root]
+    created = 1
+    while created < node_count:
+        parent = queue.pop(0)
+        for index in range(branching):
+            if created >= node_count:
+                break
+            child = {'title': f'Topic {created}', 'note': f'Note for topic {created} & <friends>'}
+            parent.setdefault('children', {})[f'topic_{created}'] = child
+            queue.append(child)
+            created += 1
+    return {'root': root}
+
+
+def wide_mind_map(width):
+    """A root with width children and nothing below them."""
+    return generate_mind_map(width + 1, branching=width)
+
+
+def deep_mind_map(depth, siblings=2):
+    """A chain of depth nested topics, each with a few leaf siblings along the way."""
+    root = {'title': 'Generated course', 'note': 'Root note'}
+    node = root
+    for level in range(depth):
+        children = {f'leaf_{level}_{index}': {'title': f'Leaf {level}.{index}'} for index in range(siblings)}
+        child = {'title': f'Level {level + 1}', 'note': f'Note at depth {level + 1}'}
+        children[f'level_{level + 1}'] = child
+        node['children'] = children
+        node = child
+    return {'root': root}
+
+
+def mind_map_yaml(data):
+    """Return the YAML text of a mind map.
+
+    The text is written out directly because PyYAML's dumper recurses once per nesting level
+    and runs out of stack on deep maps.
+    """
+    lines = []
+    stack = [('root', data['root'], 0)]
+    while stack:
+        key, node, indent = stack.pop()
+        pad = ' ' * indent
+        lines.append(f'{pad}{key}:')
+        lines.append(f'{pad}  title: {yaml.safe_dump(node["title"]).splitlines()[0]}')
+        if 'note' in node:
+            lines.append(f'{pad}  note: {yaml.safe_dump(node["note"]).splitlines()[0]}')
+        if node.get('children'):
+            lines.append(f'{pad}  children:')
+            stack.extend((child_key, child, indent + 4) for child_key, child in reversed(node['children'].items()))
+    return '\n'.join(lines) + '\n'
+
+
+ANIMATION_PAGE = '''<!DOCTYPE html>
+<html>
+<head>
+<style>
+body { margin: 0; background: white; }
+#box { width: 400px; height: 400px; background: steelblue; opacity: 0; }
+</style>
+</head>
+<body>
+<div id="box"></div>
+<script>
+const box = document.getElementById('box');
+const duration = %(duration_ms)d;
+let startTime = null;
+function step(now) {
+    if (startTime === null) startTime = now;
+    const progress = Math.min((now - startTime) / duration, 1);
+    box.style.opacity = progress.toString();
+    box.style.transform = 'rotate(' + (progress * 360) + 'deg)';
+    if (progress < 1) requestAnimationFrame(step);
+    else document.body.dataset.animationComplete = 'true';
+}
+requestAnimationFrame(step);
+</script>
+</body>
+</html>
+'''
+
+
+def write_animation_page(path, duration=1):
+    """Write a small local page that animates with requestAnimationFrame for duration seconds."""
+    Path(path).write_text(ANIMATION_PAGE % {'duration_ms': duration * 1000}, encoding='utf-8')
+    return Path(path)
@@ -0,0 +1,66 @@
+import gzip
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Text formats worth compressing; PNGs and other images are already compressed
+COMPRESSIBLE_SUFFIXES = {'.svg', '.css', '.js', '.html', '.json', '.txt', '.xml', '.map', '.ico'}
+
+
+def compress_file(path, min_size=256):
+    """Write .gz (and .br if brotli is installed) copies of path next to it.
+
+    Copies that would not be smaller than the original are not kept. Returns the
+    list of files written.
+    """
+    data = path.read_bytes()
+    if len(data) < min_size:
+        return []
+    copies = [('.gz', lambda: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        copies.append(('.br', lambda: brotli.compress(data, quality=11)))
+    written = []
+    for suffix, compress in copies:
+        target = path.with_name(path.name + suffix)
+        if target.exists() and target.stat().st_mtime >= path.stat().st_mtime:
+            written.append(target)
+            continue
+        compressed = compress()
+        if len(compressed) >= len(data):
+            target.unlink(missing_ok=True)
+            continue
+        target.write_bytes(compressed)
+        written.append(target)
+    return written
+
+
+class Command(BaseCommand):
+    help = 'Write gzip (and brotli, if installed) copies of the text files in STATIC_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-size', type=int, default=256,
+                            help='Skip files smaller than this many bytes (default: %(default)s)')
+
+    def handle(self, *args, **options):
+        static_root = Path(settings.STATIC_ROOT)
+        if not static_root.is_dir():
+            raise CommandError(f"{static_root} does not exist; run collectstatic first")
+        if brotli is None:
+            self.stdout.write("brotli is not installed; writing gzip copies only")
+        before = after = count = 0
+        for path in sorted(static_root.rglob('*')):
+            if not path.is_file() or path.suffix.lower() not in COMPRESSIBLE_SUFFIXES:
+                continue
+            written = compress_file(path, options['min_size'])
+            if written:
+                count += 1
+                before += path.stat().st_size
+                after += min(copy.stat().st_size for copy in written)
+        self.stdout.write(self.style.SUCCESS(
+            f"Compressed {count} files: {before:,} -> {after:,} bytes for the best encoding"))
@@ -1,3 +1,96 @@
-from django.test import TestCase
+import gzip
+import importlib
+import tempfile
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from . import views
+
+
+class AnimationPageTests(SimpleTestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def test_object_page_loads_svg_separately(self):
+        response = self.client.get('/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'data="/static/brain-with-png.svg"')
+        self.assertContains(response, 'animateBrain(this.contentDocument)')
+
+    def test_inline_page_embeds_svg(self):
+        response = self.client.get('/inline/')
+
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        self.assertNotIn('<object id="brain-svg"', content)
+        self.assertNotIn('<?xml', content)
+        self.assertIn('id="sfg"', content)
+        self.assertIn('id="sfg-text"', content)
+        # The PNG inside the SVG must still resolve once the SVG is part of the page
+        self.assertIn('href="/static/brain-en-49bacc-1024-edited.png"', content)
+        self.assertIn('animateBrain(document)', content)
+
+    def test_page_is_rendered_once_while_cached(self):
+        with override_settings(ANIMATION_PAGE_CACHE_SECONDS=60):
+            cached_views = importlib.reload(views)
+        try:
+            first = cached_views.animate_brain(RequestFactory().get('/'))
+            with mock.patch.object(cached_views, 'render') as render:
+                second = cached_views.animate_brain(RequestFactory().get('/'))
+            render.assert_not_called()
+            self.assertEqual(second.content, first.content)
+            self.assertIn('max-age=60', second['Cache-Control'])
+        finally:
+            importlib.reload(views)
+
+
+class StaticFileTests(SimpleTestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.static_root = Path(temp_dir.name)
+        self.svg = b'<svg xmlns="http://www.w3.org/2000/svg">' + b'<g id="sfg"/>' * 100 + b'</svg>'
+        (self.static_root / 'brain.0123456789ab.svg').write_bytes(self.svg)
+        (self.static_root / 'tiny.svg').write_bytes(b'<svg/>')
+        (self.static_root / 'image.png').write_bytes(b'\x89PNG' * 200)
+        settings_override = override_settings(STATIC_ROOT=self.static_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_compress_static_writes_smaller_gzip_copies_of_text_files(self):
+        call_command('compress_static', stdout=mock.Mock())
+
+        compressed = self.static_root / 'brain.0123456789ab.svg.gz'
+        self.assertEqual(gzip.decompress(compressed.read_bytes()), self.svg)
+        self.assertLess(compressed.stat().st_size, len(self.svg))
+        self.assertFalse((self.static_root / 'tiny.svg.gz').exists())
+        self.assertFalse((self.static_root / 'image.png.gz').exists())
+
+    def test_hashed_files_are_served_compressed_and_cached_for_a_year(self):
+        call_command('compress_static', stdout=mock.Mock())
+        request = RequestFactory().get('/static/brain.0123456789ab.svg', HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        response = views.static_file(request, 'brain.0123456789ab.svg')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.svg)
+
+    def test_plain_file_without_accept_encoding(self):
+        call_command('compress_static', stdout=mock.Mock())
+        response = views.static_file(RequestFactory().get('/static/tiny.svg'), 'tiny.svg')
+
+        self.assertNotIn('Content-Encoding', response)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertEqual(b''.join(response.streaming_content), b'<svg/>')
+
+    def test_paths_outside_static_root_are_rejected(self):
+        with self.assertRaises(SuspiciousFileOperation):
+            views.static_file(RequestFactory().get('/static/../settings.py'), '../settings.py')
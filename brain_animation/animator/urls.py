@@ -1,6 +1,12 @@
-from django.urls import path
+from django.conf import settings
+from django.urls import path, re_path
 from . import views
 
 urlpatterns = [
     path('', views.animate_brain, name='animate_brain'),
+    path('inline/', views.animate_brain_inline, name='animate_brain_inline'),
 ]
+
+if settings.SERVE_STATIC:
+    # Without DEBUG, Django's own static handler is off; serve the collected, compressed files instead
+    urlpatterns.append(re_path(rf'^{settings.STATIC_URL.strip("/")}/(?P<path>.+)$', views.static_file, name='static_file'))
@@ -1,6 +1,73 @@
+import mimetypes
+import posixpath
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.http import FileResponse, Http404
 from django.shortcuts import render
+from django.templatetags.static import static
+from django.utils._os import safe_join
+from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_GET
+
+BRAIN_SVG = 'brain-with-png.svg'
+# Things in the SVG file that don't belong inside an HTML page
+SVG_PROLOG = re.compile(r'^\s*<\?xml[^>]*\?>\s*(<!--.*?-->\s*)*', re.S)
+RELATIVE_HREF = re.compile(r'((?:xlink:)?href=")(?![#/]|[a-z]+:)([^"]+)(")')
+# ManifestStaticFilesStorage adds a 12 character content hash before the extension
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+ONE_YEAR = 365 * 24 * 60 * 60
 
 # Create your views here.
 
+@cache_page(settings.ANIMATION_PAGE_CACHE_SECONDS)
 def animate_brain(request):
     return render(request, 'animator/animate.html')
+
+def inline_svg(name=BRAIN_SVG):
+    """Return the SVG markup ready to be placed in the page, with its image links pointing at static files."""
+    path = finders.find(name)
+    if path is None:
+        raise Http404(f"{name} not found")
+    svg = SVG_PROLOG.sub('', Path(path).read_text(encoding='utf-8'))
+    # Links relative to the SVG file would be resolved against the page URL once inlined
+    directory = posixpath.dirname(name)
+    return RELATIVE_HREF.sub(
+        lambda match: f'{match.group(1)}{static(posixpath.join(directory, match.group(2)))}{match.group(3)}', svg)
+
+@cache_page(settings.ANIMATION_PAGE_CACHE_SECONDS)
+def animate_brain_inline(request):
+    return render(request, 'animator/animate_inline.html', {'svg': inline_svg()})
+
+def _accepts(request, encoding):
+    return any(part.split(';')[0].strip() == encoding
+               for part in request.headers.get('Accept-Encoding', '').split(','))
+
+@require_GET
+def static_file(request, path):
+    """Serve a collected static file, preferring the .br or .gz copy made by compress_static.
+
+    Files with a content hash in their name never change, so browsers may keep them for a year.
+    """
+    # safe_join raises SuspiciousFileOperation (a 400 response) for paths outside STATIC_ROOT
+    full_path = Path(safe_join(settings.STATIC_ROOT, path))
+    if not full_path.is_file():
+        raise Http404(path)
+    content_type, _ = mimetypes.guess_type(full_path.name)
+
+    served, encoding = full_path, None
+    for suffix, name in (('.br', 'br'), ('.gz', 'gzip')):
+        compressed = full_path.with_name(full_path.name + suffix)
+        if _accepts(request, name) and compressed.is_file():
+            served, encoding = compressed, name
+            break
+
+    response = FileResponse(open(served, 'rb'), content_type=content_type or 'application/octet-stream')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    max_age = ONE_YEAR if HASHED_NAME.search(full_path.name) else settings.ANIMATION_PAGE_CACHE_SECONDS
+    response.headers['Cache-Control'] = f'public, max-age={max_age}' + (', immutable' if max_age == ONE_YEAR else '')
+    return response
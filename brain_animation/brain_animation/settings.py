@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -19,13 +20,19 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
 
+# Set BRAIN_ANIMATION_PRODUCTION=1 to serve the kiosk page: DEBUG off, cached pages and
+# hashed, precompressed static files (run collectstatic and compress_static first)
+PRODUCTION = os.environ.get('BRAIN_ANIMATION_PRODUCTION') == '1'
+
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-#s@^3y66ii*^_pq%c7d0bckf1whj6cp*pp_f3q39f2j+t595bs'
+SECRET_KEY = os.environ.get(
+    'BRAIN_ANIMATION_SECRET_KEY',
+    'django-insecure-#s@^3y66ii*^_pq%c7d0bckf1whj6cp*pp_f3q39f2j+t595bs')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = not PRODUCTION
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = os.environ.get('BRAIN_ANIMATION_ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',') if PRODUCTION else []
 
 
 # Application definition
@@ -122,6 +129,29 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        # Content-hashed file names, so browsers can cache static files for good
+        'BACKEND': ('django.contrib.staticfiles.storage.ManifestStaticFilesStorage' if PRODUCTION
+                    else 'django.contrib.staticfiles.storage.StaticFilesStorage'),
+    },
+}
+
+# Serve STATIC_ROOT from the app (with the .br/.gz copies) when Django's debug static handler is off
+SERVE_STATIC = PRODUCTION and os.environ.get('BRAIN_ANIMATION_SERVE_STATIC', '1') == '1'
+
+# Seconds a rendered animation page is cached (0 disables the cache while developing)
+ANIMATION_PAGE_CACHE_SECONDS = int(os.environ.get('BRAIN_ANIMATION_PAGE_CACHE_SECONDS', 600 if PRODUCTION else 0))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -0,0 +1,123 @@
+import contextlib
+import queue
+import threading
+import time
+
+BLANK_PAGE = 'about:blank'
+
+class BrowserPool:
+    """A pool of warm WebDriver sessions that capture jobs and tests borrow instead of starting a browser.
+
+    factory() starts a new session; at most `size` sessions are open at once. A session is
+    checked before it is lent out and reset to a blank page with no cookies when it comes
+    back. Sessions that fail either step (a crashed browser or driver) are quit and replaced,
+    as are sessions that have been used max_uses times.
+    """
+
+    def __init__(self, factory, size=2, max_uses=50, timeout=60):
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()  # most recently used first, so spare sessions can age out
+        self.uses = {}                 # id(driver) -> times lent out
+        self.lock = threading.Lock()
+        self.open = 0
+        self.closed = False
+
+    @staticmethod
+    def healthy(driver):
+        """True if the session still answers commands."""
+        try:
+            return driver.execute_script('return 1') == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def reset(driver):
+        """Return a session to a clean page. Returns False if the session is broken."""
+        try:
+            driver.get(BLANK_PAGE)
+            driver.delete_all_cookies()
+            return True
+        except Exception:
+            return False
+
+    def retire(self, driver):
+        """Quit a session and free its place in the pool."""
+        with self.lock:
+            self.uses.pop(id(driver), None)
+            self.open -= 1
+        with contextlib.suppress(Exception):
+            driver.quit()
+
+    def acquire(self):
+        """Take a healthy session from the pool, starting one if there is room."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            if self.closed:
+                raise RuntimeError('browser pool is closed')
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                with self.lock:
+                    start = self.open < self.size
+                    if start:
+                        self.open += 1
+                if start:
+                    try:
+                        driver = self.factory()
+                    except Exception:
+                        with self.lock:
+                            self.open -= 1
+                        raise
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f'no browser session became free within {self.timeout}s')
+                    try:
+                        # Wake up now and then in case a retired session left room for a new one
+                        driver = self.idle.get(timeout=min(remaining, 0.1))
+                    except queue.Empty:
+                        continue
+            if not self.healthy(driver):
+                self.retire(driver)
+                continue
+            with self.lock:
+                self.uses[id(driver)] = self.uses.get(id(driver), 0) + 1
+            return driver
+
+    def release(self, driver):
+        """Give a session back, resetting it, or retiring it if it is broken or worn out."""
+        with self.lock:
+            worn_out = self.uses.get(id(driver), 0) >= self.max_uses
+        if self.closed or worn_out or not self.reset(driver):
+            self.retire(driver)
+        else:
+            self.idle.put(driver)
+
+    @contextlib.contextmanager
+    def session(self):
+        """Borrow a session for the duration of a with block."""
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        """Quit every idle session; sessions still lent out are quit when they are released."""
+        self.closed = True
+        while True:
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            self.retire(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
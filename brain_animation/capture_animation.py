@@ -1,52 +1,297 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
-import time
+from selenium.webdriver.support.ui import WebDriverWait
+import argparse
+import contextlib
 import os
+import queue
+import tempfile
+import threading
+import sys
+import time
 import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+from course_creation_tools import profiling
+
+# Replaces the page clock before any page script runs. requestAnimationFrame callbacks are
+# queued instead of being run by the browser, and only fire when the capture loop calls
+# __virtualClock.advanceTo(ms); performance.now() and Date.now() report the virtual time.
+VIRTUAL_TIME_SCRIPT = '''
+(function() {
+    let now = 0;
+    let nextId = 1;
+    let callbacks = [];
+    const wallClockStart = Date.now();
+    window.requestAnimationFrame = function(callback) {
+        callbacks.push([nextId, callback]);
+        return nextId++;
+    };
+    window.cancelAnimationFrame = function(id) {
+        callbacks = callbacks.filter(function(entry) { return entry[0] !== id; });
+    };
+    performance.now = function() { return now; };
+    Date.now = function() { return wallClockStart + now; };
+    window.__virtualClock = {
+        pending: function() { return callbacks.length; },
+        advanceTo: function(ms) {
+            now = ms;
+            const due = callbacks;
+            callbacks = [];
+            due.forEach(function(entry) { entry[1](now); });
+            return callbacks.length;
+        }
+    };
+})();
+'''
+
+def install_virtual_clock(driver):
+    """Make every page the driver loads from now on run on the virtual clock. Returns the script id."""
+    return driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': VIRTUAL_TIME_SCRIPT})['identifier']
+
+def remove_virtual_clock(driver, identifier):
+    """Let pages loaded from now on use the real clock again, e.g. before a pooled session is reused."""
+    driver.execute_cdp_cmd('Page.removeScriptToEvaluateOnNewDocument', {'identifier': identifier})
+
+def wait_for_animation_start(driver, timeout=10):
+    """Wait until the page has asked for its first animation frame (the SVG has loaded)."""
+    WebDriverWait(driver, timeout).until(
+        lambda d: d.execute_script('return window.__virtualClock && window.__virtualClock.pending() > 0'))
+
+def seek(driver, frame, fps):
+    """Run the page's animation frames up to (not including) frame without taking screenshots.
+
+    The clock is stepped one frame at a time, in a single script call, so the page goes
+    through exactly the same animation callbacks as in a capture from the start.
+    """
+    driver.execute_script(
+        'for (let i = 0; i < arguments[0]; i++) window.__virtualClock.advanceTo(i * arguments[1]);',
+        frame, 1000 / fps)
+
+def capture_frames(driver, frames, fps, virtual_time=True, first_frame=0):
+    """Yield PNG screenshots of the current page, one per frame, starting at first_frame.
+
+    With virtual_time the page clock is set to exactly i/fps seconds before frame i, so
+    frames are evenly spaced however long a screenshot takes. Otherwise the page runs on
+    its own clock and frames are taken with a 1/fps pause in between.
+    """
+    for i in range(first_frame, first_frame + frames):
+        if virtual_time:
+            driver.execute_script('window.__virtualClock.advanceTo(arguments[0])', i * 1000 / fps)
+        yield driver.get_screenshot_as_png()
+        if not virtual_time:
+            time.sleep(1 / fps)  # Wait for next frame
+
+class FrameEncoder:
+    """Encode PNG frames with a long-lived ffmpeg process while they are still being captured.
+
+    Frames go through a bounded queue to a writer thread that feeds ffmpeg's stdin, so
+    encoding overlaps capture, and capture blocks instead of buffering frames in memory
+    when ffmpeg falls behind. Use as a context manager; the video is complete on exit.
+    """
+
+    def __init__(self, output_file, fps=30, width=1024, height=600, queue_size=30):
+        self.command = [
+            'ffmpeg', '-y',
+            '-loglevel', 'error',
+            '-f', 'image2pipe',
+            '-framerate', str(fps),
+            '-i', '-',
+            '-vf', f'crop={width}:{height}:0:0',  # Crop to exact dimensions
+            '-c:v', 'libx264',
+            '-pix_fmt', 'yuv420p',
+            output_file
+        ]
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.process = None
+        self.writer = None
+        self.error = None
+        self.stderr = None
+
+    def __enter__(self):
+        # ffmpeg's messages go to a file: a pipe nobody reads until the end could fill up and
+        # block ffmpeg while the writer thread is blocked feeding it frames
+        self.stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stderr=self.stderr)
+        self.writer = threading.Thread(target=self._write_frames, daemon=True)
+        self.writer.start()
+        return self
 
-def capture_animation():
+    def _write_frames(self):
+        while True:
+            frame = self.frames.get()
+            if frame is None:
+                break
+            if self.error is not None:
+                continue  # keep draining so put() never blocks on a dead encoder
+            try:
+                self.process.stdin.write(frame)
+            except (BrokenPipeError, OSError) as e:
+                self.error = e
+        try:
+            self.process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+
+    def put(self, frame):
+        """Queue one PNG frame, waiting while the queue is full."""
+        if self.error is not None:
+            raise RuntimeError(f"ffmpeg stopped accepting frames: {self.error}")
+        self.frames.put(frame)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.frames.put(None)
+        self.writer.join()
+        with self.stderr:
+            if exc_type is not None:
+                self.process.kill()
+                self.process.wait()
+                return False
+            if self.process.wait() != 0:
+                self.stderr.seek(0)
+                stderr = self.stderr.read().decode(errors='replace')
+                raise RuntimeError(f"ffmpeg failed with exit code {self.process.returncode}: {stderr.strip()}")
+        return False
+
+def start_driver():
     chrome_options = Options()
     chrome_options.add_argument('--headless')
     chrome_options.add_argument('--window-size=1024,600')  # Adjusted height to be divisible by 2
     chrome_options.add_argument('--hide-scrollbars')
-    
+
     service = Service()
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    
+    return webdriver.Chrome(service=service, options=chrome_options)
+
+@contextlib.contextmanager
+def browser_session(pool=None):
+    """Borrow a session from pool (a browser_pool.BrowserPool), or start one and quit it afterwards."""
+    if pool is not None:
+        with pool.session() as driver:
+            yield driver
+        return
+    driver = start_driver()
     try:
-        # Create frames directory if it doesn't exist
-        if not os.path.exists('frames'):
-            os.makedirs('frames')
-        
-        # Navigate to the animation page
-        driver.get('http://localhost:8000')
-        
-        # Capture frames for 6 seconds (30fps = 180 frames)
-        for i in range(180):
-            driver.save_screenshot(f'frames/frame_{i:04d}.png')
-            time.sleep(1/30)  # Wait for next frame
-        
-        # Convert frames to video using ffmpeg with crop filter
-        subprocess.run([
-            'ffmpeg', '-y',
-            '-framerate', '30',
-            '-i', 'frames/frame_%04d.png',
-            '-vf', 'crop=1024:600:0:0',  # Crop to exact dimensions
-            '-c:v', 'libx264',
-            '-pix_fmt', 'yuv420p',
-            'brain_animation.mp4'
-        ])
-        
-        # Clean up frames
-        for file in os.listdir('frames'):
-            os.remove(os.path.join('frames', file))
-        os.rmdir('frames')
-        
-        print("Animation captured and saved as brain_animation.mp4")
-        
+        yield driver
     finally:
         driver.quit()
 
+def split_frames(frames, segments):
+    """Split frames into at most `segments` contiguous (first_frame, count) ranges of near-equal size."""
+    segments = max(1, min(segments, frames))
+    size, extra = divmod(frames, segments)
+    ranges, first = [], 0
+    for index in range(segments):
+        count = size + (1 if index < extra else 0)
+        ranges.append((first, count))
+        first += count
+    return ranges
+
+def capture_segment(url, segment_file, fps, first_frame, frames):
+    """Capture frames [first_frame, first_frame + frames) in a browser of its own and encode them."""
+    with profiling.span('capture_segment', first_frame=first_frame), browser_session() as driver:
+        install_virtual_clock(driver)
+        with profiling.span('capture_segment.load_page'):
+            driver.get(url)
+            wait_for_animation_start(driver)
+        with profiling.span('capture_segment.seek', frames=first_frame):
+            seek(driver, first_frame, fps)
+        with profiling.span('capture_segment.capture_frames') as span, FrameEncoder(segment_file, fps) as encoder:
+            for png in capture_frames(driver, frames, fps, first_frame=first_frame):
+                encoder.put(png)
+                span.count(frames=1, bytes=len(png))
+    return segment_file
+
+def concat_segments(segment_files, output_file):
+    """Join encoded segments into one video with ffmpeg's concat demuxer, without re-encoding."""
+    list_file = os.path.join(os.path.dirname(segment_files[0]), 'segments.txt')
+    with open(list_file, 'w') as f:
+        for segment_file in segment_files:
+            f.write(f"file '{os.path.abspath(segment_file)}'\n")
+    subprocess.run([
+        'ffmpeg', '-y',
+        '-loglevel', 'error',
+        '-f', 'concat',
+        '-safe', '0',
+        '-i', list_file,
+        '-c', 'copy',
+        output_file
+    ], check=True)
+
+def render_segments(url='http://localhost:8000', output_file='brain_animation.mp4', fps=30, duration=6,
+                    workers=None):
+    """Capture the animation with one headless browser per segment on a process pool.
+
+    Each worker loads the page, seeks its virtual clock to the start of its segment and
+    encodes the segment; the segments are then concatenated losslessly.
+    """
+    start = time.perf_counter()
+    frames = round(duration * fps)
+    ranges = split_frames(frames, workers or os.cpu_count() or 1)
+    with tempfile.TemporaryDirectory() as segment_dir:
+        segment_files = [os.path.join(segment_dir, f'segment_{index:03d}.mp4') for index in range(len(ranges))]
+        with profiling.pool_executor(len(ranges)) as executor:
+            futures = [executor.submit(capture_segment, url, segment_file, fps, first_frame, count)
+                       for segment_file, (first_frame, count) in zip(segment_files, ranges)]
+            for future in futures:
+                future.result()
+        with profiling.span('render_segments.concat', segments=len(segment_files)):
+            concat_segments(segment_files, output_file)
+    elapsed = time.perf_counter() - start
+    print(f"Captured and encoded {frames} frames in {len(ranges)} segments in {elapsed:.1f}s "
+          f"({frames / elapsed:.1f} frames/s)")
+    print(f"Animation captured and saved as {output_file}")
+
+def capture_animation(url='http://localhost:8000', output_file='brain_animation.mp4', fps=30, duration=6,
+                      virtual_time=True, pool=None):
+    with profiling.span('capture_animation', fps=fps), browser_session(pool) as driver:
+        clock = install_virtual_clock(driver) if virtual_time else None
+        try:
+            _capture(driver, url, output_file, fps, duration, virtual_time)
+        finally:
+            if clock is not None and pool is not None:
+                remove_virtual_clock(driver, clock)
+
+def _capture(driver, url, output_file, fps, duration, virtual_time):
+    # Navigate to the animation page
+    with profiling.span('capture_animation.load_page'):
+        driver.get(url)
+        if virtual_time:
+            wait_for_animation_start(driver)
+
+    # Capture frames for the whole duration (6 seconds at 30fps = 180 frames),
+    # encoding them as they arrive
+    start = time.perf_counter()
+    frames = round(duration * fps)
+    with profiling.span('capture_animation.capture_frames') as span, FrameEncoder(output_file, fps) as encoder:
+        for png in capture_frames(driver, frames, fps, virtual_time):
+            encoder.put(png)
+            span.count(frames=1, bytes=len(png))
+    elapsed = time.perf_counter() - start
+    print(f"Captured and encoded {frames} frames in {elapsed:.1f}s ({frames / elapsed:.1f} frames/s)")
+
+    print(f"Animation captured and saved as {output_file}")
+
 if __name__ == '__main__':
-    capture_animation()
+    parser = argparse.ArgumentParser(description='Record the brain animation page to an MP4 video')
+    parser.add_argument('--url', default='http://localhost:8000', help='Page to record')
+    parser.add_argument('-o', '--output', default='brain_animation.mp4', help='Video file to write')
+    parser.add_argument('--fps', type=int, default=30, help='Frames per second (default: %(default)s)')
+    parser.add_argument('--duration', type=float, default=6, help='Seconds to record (default: %(default)s)')
+    parser.add_argument('--real-time', action='store_true',
+                        help='Let the page run on its own clock instead of stepping it frame by frame')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Split the video into this many segments, each captured by its own browser '
+                             '(0 = one per core; default: %(default)s)')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.configure(args)
+
+    if args.jobs != 1:
+        if args.real_time:
+            parser.error('--jobs needs the virtual clock and cannot be combined with --real-time')
+        render_segments(args.url, args.output, args.fps, args.duration, args.jobs or None)
+    else:
+        capture_animation(args.url, args.output, args.fps, args.duration, virtual_time=not args.real_time)
+    profiling.report()
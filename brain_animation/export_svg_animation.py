@@ -0,0 +1,91 @@
+import argparse
+import base64
+import mimetypes
+import os
+import sys
+from pathlib import Path
+from xml.etree import ElementTree
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+from course_creation_tools.svg_optimizer import SVG_NS, SVG_PREFIXES, XLINK_NS, serialize_svg
+
+STATIC_DIR = Path(__file__).resolve().parent / 'static'
+# The source SVGs keep their editor data, written with the prefixes Inkscape uses
+PREFIXES = {
+    **SVG_PREFIXES,
+    'http://www.inkscape.org/namespaces/inkscape': 'inkscape',
+    'http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd': 'sodipodi',
+}
+
+# Each animation is a source SVG from static/ and a list of opacity changes. A step with the
+# same start and end switches instantly, like the label appearing at the end of animate.html.
+ANIMATIONS = {
+    'brain-animation': {
+        'source': 'brain-with-png.svg',
+        'steps': [
+            {'id': 'sfg', 'from': 0, 'to': 0.5, 'start': 0, 'end': 5},
+            {'id': 'sfg-text', 'from': 0, 'to': 1, 'start': 5, 'end': 5},
+        ],
+    },
+}
+
+def keyframes_css(steps):
+    """Return the CSS that plays the steps as keyframe animations, with no script involved."""
+    rules = []
+    for number, step in enumerate(steps):
+        name = f"step{number}-{step['id']}"
+        duration = step['end'] - step['start']
+        rules.append(f"@keyframes {name}{{from{{opacity:{step['from']}}}to{{opacity:{step['to']}}}}}")
+        # 'both' holds the start value during the delay and the end value afterwards
+        rules.append(f"#{step['id']}{{animation:{name} {duration:g}s linear {step['start']:g}s 1 both}}")
+    return ''.join(rules)
+
+def embed_images(root, base_dir):
+    """Replace links to local image files with data: URIs so the SVG works on its own."""
+    for element in root.iter(f'{{{SVG_NS}}}image'):
+        for attribute in (f'{{{XLINK_NS}}}href', 'href'):
+            href = element.get(attribute)
+            if not href or href.startswith(('data:', '#')) or '://' in href:
+                continue
+            image_file = base_dir / href
+            content_type = mimetypes.guess_type(image_file.name)[0] or 'application/octet-stream'
+            encoded = base64.b64encode(image_file.read_bytes()).decode('ascii')
+            element.set(attribute, f'data:{content_type};base64,{encoded}')
+
+def compile_animation(definition, static_dir=STATIC_DIR, embed=True):
+    """Build the SVG text of an animation definition."""
+    source = Path(static_dir) / definition['source']
+    root = ElementTree.parse(source).getroot()
+    missing = [step['id'] for step in definition['steps'] if root.find(f".//*[@id='{step['id']}']") is None]
+    if missing:
+        raise ValueError(f"{source} has no element with id {', '.join(missing)}")
+    style = ElementTree.Element(f'{{{SVG_NS}}}style')
+    style.text = keyframes_css(definition['steps'])
+    root.insert(0, style)
+    if embed:
+        embed_images(root, source.parent)
+    return serialize_svg(root, PREFIXES, xml_declaration=True)
+
+def export_animations(output_dir, names=None, static_dir=STATIC_DIR, embed=True):
+    """Write <name>.svg into output_dir for each animation. Returns the files written."""
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    for name in names or ANIMATIONS:
+        output_file = Path(output_dir) / f'{name}.svg'
+        output_file.write_text(compile_animation(ANIMATIONS[name], static_dir, embed), encoding='utf-8')
+        written.append(output_file)
+    return written
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export the brain animations as standalone animated SVG files')
+    parser.add_argument('names', nargs='*', help=f"Animations to export (default: all of {', '.join(ANIMATIONS)})")
+    parser.add_argument('-o', '--output-dir', default='dist', help='Output directory (default: dist)')
+    parser.add_argument('--link-images', action='store_true',
+                        help='Keep links to the PNG files instead of embedding them in the SVG')
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in ANIMATIONS]
+    if unknown:
+        parser.error(f"unknown animation {', '.join(unknown)}")
+
+    for output_file in export_animations(args.output_dir, args.names, embed=not args.link_images):
+        print(f"Exported {output_file} ({output_file.stat().st_size:,} bytes)")
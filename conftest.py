@@ -0,0 +1,15 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Make the course_creation_tools package importable from the tests
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'src'))
+
+
+@pytest.fixture(autouse=True)
+def yaml_cache_dir(tmp_path_factory, monkeypatch):
+    """Keep the compiled YAML cache of every test out of the user's real cache directory."""
+    directory = tmp_path_factory.mktemp('yaml-cache')
+    monkeypatch.setenv('COURSE_TOOLS_YAML_CACHE_DIR', str(directory))
+    return directory
@@ -1,14 +1,91 @@
 #!/usr/bin/env python3
 import yaml
-from graphviz import Digraph
+from graphviz import Digraph, ExecutableNotFound, FORMATS
+import argparse
+import json
+import os
+import re
+import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-def create_knowledge_graph(yaml_file, output_dir='output'):
-    # Read YAML file
-    with open(yaml_file, 'r') as f:
-        data = yaml.safe_load(f)
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'src'))
+from course_creation_tools.render_cache import RenderCache, DEFAULT_MAX_BYTES
+from course_creation_tools.graph_watcher import GraphWatcher
+from course_creation_tools.schema_validation import KNOWLEDGE_GRAPH_SCHEMA, schema_errors
+from course_creation_tools.graph_viewer import viewer_payload, viewer_html
+from course_creation_tools.svg_optimizer import format_report, optimize_svg_file
+from course_creation_tools.graph_index import GraphIndex
+from course_creation_tools.yaml_files import collect_yaml_files
+from course_creation_tools import profiling, yaml_cache
 
+try:
+    import pygraphviz
+except ImportError:
+    pygraphviz = None
+
+DEFAULT_NAME = 'knowledge_graph'
+# subprocess: write a .gv file and run dot on it (the original behaviour)
+# pipe: send the DOT source to dot over stdin and read the SVG from stdout, no temporary files
+# pygraphviz: lay out in this process through the libgvc binding, no subprocess at all
+BACKENDS = ('subprocess', 'pipe', 'pygraphviz')
+
+class GraphValidationError(ValueError):
+    """A graph refers to entities that don't exist or defines an entity id twice."""
+
+    def __init__(self, yaml_file, errors):
+        # Both arguments go to args so the error survives pickling back from a worker process
+        super().__init__(yaml_file, errors)
+        self.yaml_file = yaml_file
+        self.errors = errors
+
+    def __str__(self):
+        return f"{self.yaml_file}: " + "; ".join(self.errors)
+
+def load_graph(yaml_file):
+    """Parse a graph file and check its relationships against an id -> entity index.
+
+    Returns (data, index). Raises GraphValidationError listing every dangling
+    source/target and duplicate id, before any Digraph is built.
+    """
+    data = yaml_cache.load(yaml_file)
+
+    index, errors = index_graph(data)
+    if errors:
+        raise GraphValidationError(yaml_file, errors)
+    return data, index
+
+def index_graph(data):
+    """Build the id -> entity index and list dangling relationship ends and duplicate ids."""
+    errors = []
+    index = {}
+    for position, entity in enumerate(data['entities']):
+        if entity['id'] in index:
+            errors.append(f"entity {position} duplicates id {entity['id']!r}")
+        index[entity['id']] = entity
+    for position, rel in enumerate(data['relationships']):
+        for end in ('source', 'target'):
+            if rel[end] not in index:
+                errors.append(f"relationship {position} has unknown {end} {rel[end]!r}")
+    return index, errors
+
+def validate_graph_file(yaml_file):
+    """Check a graph file against knowledge_graph_schema.json and its entity references.
+
+    Returns every error found rather than stopping at the first one.
+    """
+    try:
+        data = yaml_cache.load(yaml_file)
+    except yaml.YAMLError as e:
+        return [f"invalid YAML: {e}"]
+    errors = schema_errors(data, KNOWLEDGE_GRAPH_SCHEMA)
+    if not errors:
+        errors = index_graph(data)[1]
+    return errors
+
+def build_digraph(data):
     # Create Digraph object
     dot = Digraph(comment='Knowledge Graph')
     dot.attr(rankdir='LR')  # Left to right layout
@@ -33,15 +110,112 @@ def create_knowledge_graph(yaml_file, output_dir='output'):
     for rel in data['relationships']:
         dot.edge(rel['source'], rel['target'], rel['name'])
 
-    # Create output directory if it doesn't exist
-    Path(output_dir).mkdir(exist_ok=True)
-    
-    # Save the graph
-    output_path = Path(output_dir) / 'knowledge_graph'
-    dot.render(output_path, format='svg', cleanup=True)
-    return output_path.with_suffix('.svg')
+    return dot
 
-def create_inline_html(svg_file, output_dir='output'):
+def layout_in_memory(dot, backend='pipe', fmt='svg'):
+    """Lay out a Digraph in memory and return the rendered bytes."""
+    if backend == 'pipe':
+        return dot.pipe(format=fmt)
+    if backend == 'pygraphviz':
+        if pygraphviz is None:
+            raise RuntimeError("The pygraphviz backend needs the pygraphviz package (pip install pygraphviz)")
+        return pygraphviz.AGraph(string=dot.source).draw(format=fmt, prog='dot')
+    raise ValueError(f"Unknown in-memory backend {backend!r}, expected 'pipe' or 'pygraphviz'")
+
+def _run_graphviz(command, source):
+    """Run a Graphviz program on source (bytes) and return its standard output."""
+    try:
+        result = subprocess.run(command, input=source, capture_output=True)
+    except FileNotFoundError:
+        raise ExecutableNotFound(command) from None
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} failed: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout
+
+def layout_formats(dot, output_path, formats, backend='subprocess', concurrent=False):
+    """Lay a Digraph out once and write output_path.<format> for every format. Returns {format: file}.
+
+    dot runs once with a -T/-o pair per format. With concurrent, dot writes the positioned graph
+    instead and each format is drawn from it by `neato -n2` in a thread of its own, which uses the
+    positions as they are. The pygraphviz backend lays the graph out in this process and draws
+    every format from that layout.
+    """
+    output_path = Path(output_path)
+    files = {fmt: output_path.with_name(f'{output_path.name}.{fmt}') for fmt in formats}
+    source = dot.source.encode('utf-8')
+    if backend == 'pygraphviz':
+        if pygraphviz is None:
+            raise RuntimeError("The pygraphviz backend needs the pygraphviz package (pip install pygraphviz)")
+        graph = pygraphviz.AGraph(string=dot.source)
+        graph.layout(prog=dot.engine)
+        for fmt in formats:
+            graph.draw(str(files[fmt]), format=fmt)
+    elif concurrent:
+        positioned = _run_graphviz([dot.engine, '-Tdot'], source)
+        with ThreadPoolExecutor(max_workers=len(formats)) as executor:
+            list(executor.map(lambda fmt: _run_graphviz(['neato', '-n2', f'-T{fmt}', '-o', str(files[fmt])],
+                                                        positioned), formats))
+    else:
+        command = [dot.engine]
+        for fmt in formats:
+            command += [f'-T{fmt}', '-o', str(files[fmt])]
+        _run_graphviz(command, source)
+    return files
+
+def create_knowledge_graph(yaml_file, output_dir='output', name=DEFAULT_NAME, cache=None, backend='subprocess',
+                           fmt='svg', extra_formats=(), concurrent=False):
+    with profiling.span('create_knowledge_graph', format=fmt):
+        # Read and check the YAML file
+        with profiling.span('create_knowledge_graph.load_graph'):
+            data, _ = load_graph(yaml_file)
+        return render_knowledge_graph(data, output_dir, name, cache, backend, fmt, extra_formats, concurrent)
+
+def render_knowledge_graph(data, output_dir='output', name=DEFAULT_NAME, cache=None, backend='subprocess',
+                           fmt='svg', extra_formats=(), concurrent=False):
+    """Lay out an already loaded graph and write it to output_dir/name.fmt. Returns the file.
+
+    extra_formats (for example ('png', 'pdf')) are written next to it as name.<format> from the
+    same layout, see layout_formats.
+    """
+    formats = [fmt] + [extra for extra in dict.fromkeys(extra_formats) if extra != fmt]
+    with profiling.span('render_knowledge_graph', format=','.join(formats)) as span:
+        span.count(nodes=len(data['entities']), edges=len(data['relationships']))
+        with profiling.span('render_knowledge_graph.build_digraph'):
+            dot = build_digraph(data)
+
+        # Create output directory if it doesn't exist
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+        # Save the graph, reusing an earlier layout of identical DOT source if we have one
+        output_path = Path(output_dir) / name
+        files = {graph_format: output_path.with_name(f'{name}.{graph_format}') for graph_format in formats}
+        missing = formats
+        # Drawings from the positioned graph may differ from dot's own, so every format takes the
+        # same path, even when only one of them is missing from the cache
+        prelayout = concurrent and backend != 'pygraphviz' and len(formats) > 1
+        if cache is not None:
+            keys = {graph_format: cache.key(dot.source, graph_format, dot.engine, backend, prelayout)
+                    for graph_format in formats}
+            with profiling.span('render_knowledge_graph.cache_fetch') as fetch:
+                missing = [graph_format for graph_format in formats
+                           if not cache.fetch(keys[graph_format], graph_format, files[graph_format])]
+                fetch.count(hits=len(formats) - len(missing))
+        if missing:
+            with profiling.span('render_knowledge_graph.layout', backend=backend) as layout:
+                if prelayout or len(missing) > 1:
+                    layout_formats(dot, output_path, missing, backend, prelayout)
+                elif backend == 'subprocess':
+                    dot.render(output_path, format=missing[0], cleanup=True)
+                else:
+                    files[missing[0]].write_bytes(layout_in_memory(dot, backend, missing[0]))
+                layout.count(bytes=sum(files[graph_format].stat().st_size for graph_format in missing))
+            if cache is not None:
+                for graph_format in missing:
+                    cache.store(keys[graph_format], graph_format, files[graph_format])
+        return files[fmt]
+
+@profiling.profiled('create_inline_html')
+def create_inline_html(svg_file, output_dir='output', name=DEFAULT_NAME):
     # Read the SVG content
     with open(svg_file, 'r') as f:
         svg_content = f.read()
@@ -93,17 +267,247 @@ def create_inline_html(svg_file, output_dir='output'):
 </html>'''
     
     # Write the HTML file
-    output_path = Path(output_dir) / 'knowledge_graph_inline.html'
+    output_path = Path(output_dir) / f'{name}_inline.html'
     with open(output_path, 'w') as f:
         f.write(html_content)
     return output_path
 
-if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print("Usage: python knowledge_graph_visualizer.py <yaml_file>")
+def create_viewer_html(layout_file, output_dir='output', name=DEFAULT_NAME):
+    """Write a canvas viewer page for large graphs from a Graphviz json0 layout.
+
+    Only nodes and edges inside the viewport are drawn, labels are dropped when zoomed
+    far out, and entity descriptions are parsed only when the first tooltip is shown.
+    """
+    with open(layout_file, 'r', encoding='utf-8') as f:
+        layout = json.load(f)
+    payload, descriptions = viewer_payload(layout)
+
+    output_path = Path(output_dir) / f'{name}_viewer.html'
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(viewer_html(payload, descriptions))
+    return output_path
+
+def render_graph(yaml_file, output_dir='output', name=DEFAULT_NAME, cache=None, backend='subprocess', html='inline',
+                 optimize_svg=False, formats=(), concurrent_formats=False):
+    """Render one YAML file to a graph file and an HTML page.
+
+    html='inline' writes an SVG and a page with the SVG embedded; html='viewer' writes a
+    json0 layout and a canvas viewer page, which stays responsive on very large graphs.
+    optimize_svg shrinks the SVG before it is inlined. formats adds more files, such as PNG
+    and PDF, drawn from the same layout.
+    """
+    fmt = 'json0' if html == 'viewer' else 'svg'
+    graph_file = create_knowledge_graph(yaml_file, output_dir, name, cache, backend, fmt, formats, concurrent_formats)
+    return graph_file, _create_html(graph_file, output_dir, name, html, optimize_svg)
+
+def _create_html(graph_file, output_dir, name, html, optimize_svg):
+    if html == 'viewer':
+        return create_viewer_html(graph_file, output_dir, name)
+    if optimize_svg:
+        # Merged style classes would be global in the page, so two inlined graphs could restyle
+        # each other, and a class loses to page CSS that the style attribute used to override
+        print(format_report(optimize_svg_file(graph_file, merge_styles=False)))
+    return create_inline_html(graph_file, output_dir, name)
+
+def focus_name(name, entity_id):
+    """Output name for the focused view of one entity; ids are not always safe in file names."""
+    return f"{name}_{re.sub(r'[^A-Za-z0-9_.-]', '_', entity_id)}"
+
+def _focus_job(data, output_dir, name, cache=None, backend='subprocess', html='inline', optimize_svg=False,
+               formats=(), concurrent_formats=False):
+    fmt = 'json0' if html == 'viewer' else 'svg'
+    graph_file = render_knowledge_graph(data, output_dir, name, cache, backend, fmt, formats, concurrent_formats)
+    return graph_file, _create_html(graph_file, output_dir, name, html, optimize_svg)
+
+def render_focus(yaml_file, focus_ids, hops=1, output_dir='output', name=DEFAULT_NAME, workers=None, **options):
+    """Render the neighbourhood of each focus entity as a small graph of its own.
+
+    The neighbourhood is every entity within hops relationships, in either direction. The
+    YAML is parsed and indexed once and the focused graphs are laid out in parallel on a
+    process pool. options are passed on as in render_graph. Repeated focus ids are rendered
+    once. Returns a list of (entity_id, graph_file, html_file) tuples in the order of focus_ids.
+    """
+    focus_ids = list(dict.fromkeys(focus_ids))
+    with profiling.span('render_focus.load_graph'):
+        data, _ = load_graph(yaml_file)
+        graph = GraphIndex(data)
+    errors = [f"focus entity {entity_id!r} is not in the graph" for entity_id in focus_ids if entity_id not in graph]
+    # Ids such as 'a b' and 'a_b' would otherwise have two workers writing the same files
+    names = {}
+    for entity_id in focus_ids:
+        names.setdefault(focus_name(name, entity_id), []).append(entity_id)
+    errors += [f"focus entities {', '.join(map(repr, ids))} would all be written as {output_name}.svg"
+               for output_name, ids in names.items() if len(ids) > 1]
+    if errors:
+        raise GraphValidationError(yaml_file, errors)
+    workers = workers or os.cpu_count() or 1
+    with profiling.pool_executor(min(workers, max(len(focus_ids), 1))) as executor:
+        futures = [executor.submit(_focus_job, graph.ego_graph(entity_id, hops), output_dir,
+                                   focus_name(name, entity_id), **options)
+                   for entity_id in focus_ids]
+        return [(entity_id, *future.result()) for entity_id, future in zip(focus_ids, futures)]
+
+def _render_job(yaml_file, relative_name, output_dir, options):
+    return render_graph(yaml_file, Path(output_dir) / relative_name.parent, relative_name.name, **options)
+
+def render_batch(patterns, output_dir='output', workers=None, **options):
+    """Render every YAML file matched by patterns on a process pool sized to the core count.
+
+    options are passed on to render_graph. A file that fails does not stop the others.
+    Returns a summary dict with 'rendered', a list of (yaml_file, graph_file, html_file)
+    tuples, and 'failed', a list of (yaml_file, error) pairs, both in input order.
+    """
+    jobs = collect_yaml_files(patterns, output_suffix='.svg')
+    workers = workers or os.cpu_count() or 1
+    results, errors = {}, {}
+    with profiling.pool_executor(min(workers, max(len(jobs), 1))) as executor:
+        futures = {executor.submit(_render_job, yaml_file, relative_name, output_dir, options): yaml_file
+                   for yaml_file, relative_name in jobs}
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                errors[futures[future]] = e
+    return {
+        'rendered': [(yaml_file, *results[yaml_file]) for yaml_file, _ in jobs if yaml_file in results],
+        'failed': [(yaml_file, errors[yaml_file]) for yaml_file, _ in jobs if yaml_file in errors],
+    }
+
+def validate_files(patterns):
+    """Validate every matched file and print its errors. Returns the number of invalid files."""
+    start = time.perf_counter()
+    jobs = collect_yaml_files(patterns, output_suffix='.svg')
+    invalid = 0
+    for yaml_file, _ in jobs:
+        errors = validate_graph_file(yaml_file)
+        if errors:
+            invalid += 1
+            print(f"{yaml_file}: {len(errors)} error(s)")
+            for error in errors:
+                print(f"  {error}")
+    elapsed = time.perf_counter() - start
+    print(f"Validated {len(jobs)} files in {elapsed:.2f}s, {invalid} invalid")
+    return invalid
+
+def report_error(error, yaml_file=None):
+    """Print why a graph could not be rendered, listing each validation error on its own line."""
+    if isinstance(error, GraphValidationError):
+        print(f"Invalid knowledge graph {error.yaml_file}:")
+        for message in error.errors:
+            print(f"  {message}")
+    else:
+        print(f"Error rendering {yaml_file}: {error}")
+
+def watch(patterns, output_dir='output', debounce=0.5, single=False, **options):
+    """Re-render graphs in this process whenever their entities or relationships change."""
+    def collect():
+        if single:
+            return [(Path(patterns[0]).resolve(), Path(DEFAULT_NAME))]
+        return collect_yaml_files(patterns, missing_ok=True, output_suffix='.svg')
+
+    def render(yaml_file, relative_name):
+        graph_file, html_file = _render_job(yaml_file, relative_name, output_dir, options)
+        print(f"{yaml_file}: {graph_file}, {html_file}")
+
+    print(f"Watching {', '.join(patterns)} (Ctrl-C to stop)")
+    GraphWatcher(collect, render, debounce=debounce).run()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render knowledge graph YAML files to SVG and inline HTML')
+    parser.add_argument('inputs', nargs='+',
+                        help='YAML file, or (batch mode) several files, directories or glob patterns')
+    parser.add_argument('-o', '--output-dir', default='output', help='Output directory (default: output)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Number of worker processes in batch mode (default: number of cores)')
+    parser.add_argument('--cache-dir', help='Reuse earlier renders of identical graphs from this directory')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help='Maximum render cache size in MB (default: %(default)s)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and re-render graphs whose entities or relationships change')
+    parser.add_argument('--debounce', type=float, default=0.5,
+                        help='Seconds a file must stay unchanged before it is re-rendered in watch mode')
+    parser.add_argument('--backend', choices=BACKENDS, default='subprocess',
+                        help='How Graphviz is run: subprocess (default, via a temporary .gv file), '
+                             'pipe (stdin/stdout, no temporary files) or pygraphviz (in-process)')
+    parser.add_argument('--validate-only', action='store_true',
+                        help='Check the inputs against knowledge_graph_schema.json without rendering')
+    parser.add_argument('--html', choices=('inline', 'viewer'), default='inline',
+                        help='inline (default): SVG embedded in a page; viewer: canvas viewer with '
+                             'viewport culling for graphs with thousands of nodes')
+    parser.add_argument('--optimize-svg', action='store_true',
+                        help='Strip comments and unused ids and round coordinates in the SVG before inlining it')
+    parser.add_argument('--focus', action='append', default=[], metavar='ID',
+                        help='Render only the neighbourhood of this entity, as <name>_<ID>.svg; repeat it or '
+                             'give a comma separated list for several focused graphs from one parse')
+    parser.add_argument('--hops', type=int, default=1,
+                        help='How many relationships away from a --focus entity to include (default: 1)')
+    parser.add_argument('--formats', default='', metavar='LIST',
+                        help='Also write these Graphviz formats from the same layout, for example png,pdf '
+                             '(the SVG or json0 for the HTML page is always written)')
+    parser.add_argument('--concurrent-formats', action='store_true',
+                        help='Lay the graph out once to positioned DOT and draw the --formats in parallel')
+    parser.add_argument('--no-yaml-cache', action='store_true',
+                        help='Always parse the YAML instead of reusing the compiled copy of each unchanged file '
+                             'from the per-user cache')
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.configure(args)
+    if args.no_yaml_cache:
+        yaml_cache.disable()
+    focus_ids = [entity_id for value in args.focus for entity_id in value.split(',') if entity_id]
+    formats = [fmt.strip().lower() for fmt in args.formats.split(',') if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown:
+        parser.error(f"unknown Graphviz format {', '.join(unknown)}")
+    if args.validate_only:
+        sys.exit(1 if validate_files(args.inputs) else 0)
+    cache = RenderCache(args.cache_dir, args.cache_size * 1024 * 1024) if args.cache_dir else None
+    options = dict(cache=cache, backend=args.backend, html=args.html, optimize_svg=args.optimize_svg,
+                   formats=formats, concurrent_formats=args.concurrent_formats)
+
+    # A single YAML file keeps the original knowledge_graph.svg / knowledge_graph_inline.html names
+    single = len(args.inputs) == 1 and Path(args.inputs[0]).is_file()
+    if focus_ids and (args.watch or not single):
+        parser.error('--focus needs a single YAML file and cannot be combined with --watch')
+    try:
+        if focus_ids:
+            results = render_focus(args.inputs[0], focus_ids, args.hops, args.output_dir, workers=args.jobs,
+                                   **options)
+            for entity_id, graph_file, html_file in results:
+                print(f"{entity_id} ({args.hops} hops): {graph_file}, {html_file}")
+            print(f"Rendered {len(results)} focused graphs into {args.output_dir}")
+        elif args.watch:
+            watch(args.inputs, args.output_dir, args.debounce, single, **options)
+        elif single:
+            graph_file, html_file = render_graph(args.inputs[0], args.output_dir, **options)
+            if args.html == 'viewer':
+                print(f"Generated layout file: {graph_file}")
+                print(f"Generated viewer HTML file: {html_file}")
+            else:
+                print(f"Generated SVG file: {graph_file}")
+                print(f"Generated inline HTML file: {html_file}")
+            for fmt in formats:
+                if fmt != graph_file.suffix[1:]:
+                    print(f"Generated {fmt.upper()} file: {graph_file.with_suffix(f'.{fmt}')}")
+        else:
+            summary = render_batch(args.inputs, args.output_dir, args.jobs, **options)
+            for yaml_file, graph_file, html_file in summary['rendered']:
+                print(f"{yaml_file}: {graph_file}, {html_file}")
+            for yaml_file, error in summary['failed']:
+                report_error(error, yaml_file)
+            print(f"Rendered {len(summary['rendered'])} graphs into {args.output_dir}, "
+                  f"{len(summary['failed'])} failed")
+            if summary['failed']:
+                sys.exit(1)
+    except GraphValidationError as e:
+        report_error(e)
         sys.exit(1)
-    
-    svg_file = create_knowledge_graph(sys.argv[1])
-    inline_html = create_inline_html(svg_file)
-    print(f"Generated SVG file: {svg_file}")
-    print(f"Generated inline HTML file: {inline_html}")
+
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Render cache: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['entries']} entries ({stats['bytes'] / (1024 * 1024):.1f} MB)")
+    profiling.report()
+
+if __name__ == '__main__':
+    main()
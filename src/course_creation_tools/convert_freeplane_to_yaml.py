@@ -0,0 +1,171 @@
+import yaml
+from xml.etree.ElementTree import iterparse
+import argparse
+import io
+import os
+import re
+
+INDENT = '  '
+# Titles made only of these characters can be written as plain YAML scalars without quoting
+PLAIN_SCALAR = re.compile(r"[^\W\d][\w .,()/&+'-]*[\w.)]|[^\W\d]", re.UNICODE)
+# Characters that can't appear in a mind-map key (see mindmap-schema.json)
+KEY_SEPARATORS = re.compile(r'[^a-zA-Z0-9]+')
+MAX_KEY_LENGTH = 40
+# Paragraph text as Freeplane pretty-prints it: on indented lines between the <p> and </p> tags
+PRETTY_PRINTED = re.compile(r'\n[ \t]+\S.*\n[ \t]*', re.DOTALL)
+YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+_resolver = yaml.resolver.Resolver()
+
+def yaml_scalar(value):
+    """Format a string as a YAML scalar, quoting it only when needed."""
+    if PLAIN_SCALAR.fullmatch(value) and \
+            _resolver.resolve(yaml.ScalarNode, value, (True, False)) == 'tag:yaml.org,2002:str':
+        return value
+    # A huge width stops long titles and notes being folded over several lines
+    text = yaml.dump(value, Dumper=YAML_DUMPER, width=2 ** 31 - 1, allow_unicode=True)
+    # Plain scalars dumped on their own are followed by an explicit document end marker
+    return text[:-len('\n...\n')] if text.endswith('\n...\n') else text.rstrip('\n')
+
+def node_key(title, used_keys):
+    """Make a key for a node from its title that is unique among its siblings.
+
+    used_keys is a dict of the sibling keys taken so far, each mapped to the last number
+    used to tell it apart, so a parent with many same-titled children stays fast.
+    """
+    base = KEY_SEPARATORS.sub('_', title).strip('_').lower()[:MAX_KEY_LENGTH].rstrip('_') or 'node'
+    key, number = base, used_keys.get(base, 1)
+    while key in used_keys:
+        number += 1
+        key = f"{base}_{number}"
+    used_keys[base] = number
+    used_keys.setdefault(key, 1)
+    return key
+
+def _paragraph_text(paragraph):
+    text = ''.join(paragraph.itertext())
+    # Freeplane pretty-prints its HTML, putting paragraph text on its own indented lines;
+    # whitespace in that layout is HTML formatting, not part of the text. A note written by
+    # convert_yaml_to_freeplane keeps its text as is, even when it starts with a line break,
+    # unless it also starts with an indented line and ends with a line break.
+    if PRETTY_PRINTED.fullmatch(text):
+        return ' '.join(text.split())
+    return text
+
+def richcontent_text(richcontent):
+    """Return the text of a richcontent element, one line per HTML paragraph."""
+    body = richcontent.find('html/body')
+    if body is None:
+        return ' '.join(''.join(richcontent.itertext()).split())
+    paragraphs = body.findall('.//p')
+    if not paragraphs:
+        return ' '.join(''.join(body.itertext()).split())
+    return '\n'.join(_paragraph_text(paragraph) for paragraph in paragraphs)
+
+class _YamlNode:
+    """A node whose start tag has been read; its YAML is written as soon as its title is known."""
+
+    __slots__ = ('title', 'note', 'depth', 'written', 'has_children', 'child_keys')
+
+    def __init__(self, title, depth):
+        self.title = title
+        self.note = None
+        self.depth = depth
+        self.written = False
+        self.has_children = False
+        self.child_keys = {}
+
+def _write_field(out, indent, name, value):
+    lines = yaml_scalar(value).split('\n')
+    out.write(f"{indent}{name}: {lines[0]}\n")
+    for line in lines[1:]:
+        out.write(f"{indent}{line}\n" if line else "\n")
+
+def _write_header(out, node, parent):
+    if node.written:
+        return
+    field_indent = INDENT * (2 * node.depth - 1)
+    if parent is None:
+        out.write("root:\n")
+    else:
+        out.write(f"{INDENT * (2 * node.depth - 2)}{yaml_scalar(node_key(node.title or '', parent.child_keys))}:\n")
+    _write_field(out, field_indent, 'title', node.title or '')
+    if node.note is not None:
+        _write_field(out, field_indent, 'note', node.note)
+    node.written = True
+
+def write_yaml(mm_source, out):
+    """Stream a Freeplane map (a file name or binary file object) to out as mind-map YAML.
+
+    The map is read with iterparse and every element is dropped once it has been
+    turned into YAML, so memory use does not grow with the size of the map. Node
+    titles come from the TEXT attribute, or the HTML of a NODE richcontent when there
+    is none, and notes from the NOTE richcontent. Freeplane does not keep the YAML keys,
+    so they are made from the titles.
+    """
+    nodes = []     # _YamlNode for every open <node>
+    elements = []  # every open element, to find the parent of the one that ends
+    for event, element in iterparse(mm_source, events=('start', 'end')):
+        if event == 'start':
+            if element.tag == 'node':
+                parent = nodes[-1] if nodes else None
+                if parent is not None:
+                    _write_header(out, parent, nodes[-2] if len(nodes) > 1 else None)
+                    if not parent.has_children:
+                        out.write(f"{INDENT * (2 * parent.depth - 1)}children:\n")
+                        parent.has_children = True
+                nodes.append(_YamlNode(element.get('TEXT'), len(nodes) + 1))
+            elements.append(element)
+            continue
+
+        elements.pop()
+        parent_element = elements[-1] if elements else None
+        if element.tag == 'richcontent' and parent_element is not None and parent_element.tag == 'node':
+            node = nodes[-1]
+            if element.get('TYPE') == 'NODE' and node.title is None:
+                node.title = richcontent_text(element)
+            elif element.get('TYPE') == 'NOTE':
+                node.note = richcontent_text(element)
+                if node.written:
+                    # The note came after the children; a YAML mapping doesn't mind the order
+                    _write_field(out, INDENT * (2 * node.depth - 1), 'note', node.note)
+        elif element.tag == 'node':
+            _write_header(out, nodes[-1], nodes[-2] if len(nodes) > 1 else None)
+            nodes.pop()
+        # Drop finished children of nodes so the tree built by iterparse stays empty
+        if parent_element is not None and parent_element.tag in ('node', 'map'):
+            element.clear()
+            parent_element.remove(element)
+
+def converter(mm_content):
+    """Convert Freeplane mind map content to YAML."""
+    if isinstance(mm_content, str):
+        mm_content = mm_content.encode('utf-8')
+    out = io.StringIO()
+    write_yaml(io.BytesIO(mm_content), out)
+    return out.getvalue()
+
+def convert_freeplane_file(mm_file_path, yaml_file_path):
+    """Convert a Freeplane mind map file to a YAML file."""
+    with open(yaml_file_path, 'w', encoding='utf-8') as yaml_file:
+        write_yaml(mm_file_path, yaml_file)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert Freeplane mind map to YAML file')
+    parser.add_argument('input_file', help='Input Freeplane .mm file path')
+    parser.add_argument('output_dir', help='Output directory for the YAML file')
+
+    args = parser.parse_args(argv)
+
+    # Create output directory if it doesn't exist
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    # Generate output filename based on input filename
+    input_basename = os.path.splitext(os.path.basename(args.input_file))[0]
+    output_file = os.path.join(args.output_dir, f"{input_basename}.yaml")
+
+    convert_freeplane_file(args.input_file, output_file)
+    print(f"Converted {args.input_file} to {output_file}")
+    return output_file
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,49 @@
 import yaml
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom import minidom
+from xml.etree.ElementTree import Element, SubElement
 import uuid
 import argparse
+import hashlib
+import io
+import json
 import os
+import sys
+import time
+from concurrent.futures import as_completed
+from pathlib import Path
+
+try:
+    from . import profiling, yaml_cache
+    from .schema_validation import MINDMAP_SCHEMA, schema_errors
+    from .yaml_cache import YAML_LOADER
+    from .yaml_files import YAML_SUFFIXES, collect_yaml_files
+except ImportError:  # run as a script
+    import profiling
+    import yaml_cache
+    from schema_validation import MINDMAP_SCHEMA, schema_errors
+    from yaml_cache import YAML_LOADER
+    from yaml_files import YAML_SUFFIXES, collect_yaml_files
+
+MAP_VERSION = '1.9.13'
+INDENT = '    '
+POSITIONS = ['right', 'left']
+START, END = 'start', 'end'
+# Remembers which source each .mm file in an output directory was converted from
+MANIFEST_FILE = '.freeplane-manifest.json'
 
 def generate_node_id():
     """Generate a unique ID for a node."""
     return f"ID_{str(uuid.uuid4()).replace('-', '_')}"
 
+def stable_node_id(key_path):
+    """Derive a node ID from its key path in the children mappings, so it is the same on every run.
+
+    The path is hashed as a JSON list so keys containing '/' can't collide with nested paths.
+    Each key is hashed with its type, so sibling keys 2024 and "2024" get different IDs.
+    """
+    encoded = json.dumps([f"{type(key).__name__}:{key}" for key in key_path], ensure_ascii=False)
+    digest = hashlib.blake2b(encoded.encode('utf-8'), digest_size=8).hexdigest()
+    return f"ID_{digest}"
+
 def create_note_element(note_text):
     """Create a richcontent note element with the given text."""
     richcontent = Element('richcontent', {
@@ -22,79 +57,297 @@ def create_note_element(note_text):
     p.text = note_text
     return richcontent
 
+def _children(node_data):
+    return enumerate((node_data.get('children') or {}).items())
+
+def walk_nodes(node_data, position=None, alternate_children=True, depth=1, key_path=()):
+    """Walk a node and its descendants without recursion.
+
+    Yields ('start', node_data, position, depth, key_path) when a node is entered and
+    ('end', node_data, None, depth, key_path) once all its children have been walked.
+    node_data itself is at the given depth and key_path; each child adds its key to
+    the path. When alternate_children is set, the node's own children get alternating
+    right/left positions, as top-level children of a map do.
+    """
+    yield START, node_data, position, depth, key_path
+    stack = [(node_data, _children(node_data), depth, key_path)]
+    while stack:
+        parent_data, children, parent_depth, parent_path = stack[-1]
+        for position_index, (child_key, child_data) in children:
+            # Alternate between right and left for top-level children
+            child_position = (POSITIONS[position_index % 2]
+                              if parent_depth == depth and alternate_children else None)
+            child_path = parent_path + (child_key,)
+            yield START, child_data, child_position, parent_depth + 1, child_path
+            stack.append((child_data, _children(child_data), parent_depth + 1, child_path))
+            break
+        else:
+            stack.pop()
+            yield END, parent_data, None, parent_depth, parent_path
+
 def add_node_recursive(parent_element, node_data, position=None):
-    """Recursively add nodes to the mind map."""
-    # Create node element with basic attributes
-    node_attrs = {
-        'TEXT': node_data['title'],
-        'ID': generate_node_id()
-    }
-    if position:
-        node_attrs['POSITION'] = position
+    """Add a node and all its descendants to an ElementTree element.
 
-    node = SubElement(parent_element, 'node', node_attrs)
+    Despite the name this no longer recurses, so deep maps don't hit the recursion limit.
+    """
+    elements = [parent_element]
+    for event, data, node_position, _, _ in walk_nodes(node_data, position, parent_element.tag == 'map'):
+        if event == END:
+            elements.pop()
+            continue
+        # Create node element with basic attributes
+        node_attrs = {
+            'TEXT': data['title'],
+            'ID': generate_node_id()
+        }
+        if node_position:
+            node_attrs['POSITION'] = node_position
+        node = SubElement(elements[-1], 'node', node_attrs)
 
-    # Add note if present
+        # Add note if present
+        if 'note' in data:
+            node.append(create_note_element(data['note']))
+        elements.append(node)
+
+def _escape(value):
+    # Same escaping as minidom, which wrote the original pretty-printed output
+    return (str(value).replace("&", "&amp;").replace("<", "&lt;")
+            .replace("\"", "&quot;").replace(">", "&gt;"))
+
+def _escape_attribute(value):
+    # XML parsers turn literal tabs and line breaks in attributes into spaces, so write them
+    # as character references (as minidom does since Python 3.13) to keep titles intact
+    return _escape(value).replace("\t", "&#9;").replace("\n", "&#10;").replace("\r", "&#13;")
+
+def _escape_text(value):
+    # The XML parser in the old ElementTree -> minidom round trip normalised line endings in text
+    return _escape(str(value).replace("\r\n", "\n").replace("\r", "\n"))
+
+def write_note(out, note_text, indent):
+    """Write a richcontent note element, indented like minidom's toprettyxml."""
+    inner = indent + INDENT
+    out.write(f'{indent}<richcontent TYPE="NOTE" CONTENT-TYPE="xml/">\n')
+    out.write(f'{inner}<html>\n')
+    out.write(f'{inner}{INDENT}<head/>\n')
+    out.write(f'{inner}{INDENT}<body>\n')
+    if note_text is None or note_text == '':
+        out.write(f'{inner}{INDENT * 2}<p/>\n')
+    else:
+        out.write(f'{inner}{INDENT * 2}<p>{_escape_text(note_text)}</p>\n')
+    out.write(f'{inner}{INDENT}</body>\n')
+    out.write(f'{inner}</html>\n')
+    out.write(f'{indent}</richcontent>\n')
+
+def _is_leaf(node_data):
+    return 'note' not in node_data and not node_data.get('children')
+
+def _write_start(out, node_data, position, depth, key_path, stable_ids):
+    indent = INDENT * depth
+    node_id = stable_node_id(key_path) if stable_ids else generate_node_id()
+    attributes = f' TEXT="{_escape_attribute(node_data["title"])}" ID="{node_id}"'
+    if position:
+        attributes += f' POSITION="{position}"'
+    if _is_leaf(node_data):
+        out.write(f'{indent}<node{attributes}/>\n')
+        return
+    out.write(f'{indent}<node{attributes}>\n')
     if 'note' in node_data:
-        node.append(create_note_element(node_data['note']))
-
-    # Process children if present
-    if 'children' in node_data:
-        # Alternate positions for children
-        positions = ['right', 'left']
-        position_index = 0
-        
-        for child_key, child_data in node_data['children'].items():
-            # Alternate between right and left for top-level children
-            child_position = positions[position_index % 2] if parent_element.tag == 'map' else None
-            position_index += 1
-            add_node_recursive(node, child_data, child_position)
+        write_note(out, node_data['note'], indent + INDENT)
+
+def _write_end(out, node_data, depth):
+    if not _is_leaf(node_data):
+        out.write(f'{INDENT * depth}</node>\n')
 
-def converter(yaml_content):
+def write_subtree(out, node_data, position=None, depth=1, key_path=(), stable_ids=False):
+    """Write a node and all its descendants. Returns the number of nodes written."""
+    nodes = 0
+    for event, data, node_position, node_depth, node_path in walk_nodes(
+            node_data, position, depth == 1, depth, key_path):
+        if event == START:
+            _write_start(out, data, node_position, node_depth, node_path, stable_ids)
+            nodes += 1
+        else:
+            _write_end(out, data, node_depth)
+    return nodes
+
+def write_mind_map(data, out, stable_ids=False):
+    """Write parsed mind-map data as Freeplane XML to a text file handle.
+
+    Produces the same bytes as building an ElementTree and pretty-printing it with
+    minidom, without holding the document in memory or recursing per level, except
+    that tabs and line breaks in titles are written as character references.
+
+    With stable_ids, node IDs are derived from each node's key path instead of uuid4,
+    so converting the same YAML twice gives identical files.
+
+    Returns the number of nodes in the map.
+    """
+    out.write('<?xml version="1.0" ?>\n')
+    out.write(f'<map version="{MAP_VERSION}">\n')
+    nodes = write_subtree(out, data['root'], stable_ids=stable_ids)
+    out.write('</map>\n')
+    return nodes
+
+def converter(yaml_content, stable_ids=False):
     """Convert YAML content to Freeplane mind map format."""
-    # Parse YAML content
-    data = yaml.safe_load(yaml_content)
+    with profiling.span('converter'):
+        # Parse YAML content
+        with profiling.span('converter.parse_yaml', bytes=len(yaml_content)):
+            data = yaml.load(yaml_content, Loader=YAML_LOADER)
+
+        out = io.StringIO()
+        with profiling.span('converter.write_mind_map') as span:
+            span.count(nodes=write_mind_map(data, out, stable_ids))
+        return out.getvalue()
+
+def convert_yaml_file(yaml_file_path, output_file_path, stable_ids=False):
+    """Convert a YAML file to a Freeplane mind map file. Returns the number of nodes written."""
+    with profiling.span('convert_yaml_file'):
+        with profiling.span('convert_yaml_file.parse_yaml', bytes=os.path.getsize(yaml_file_path)):
+            data = yaml_cache.load(yaml_file_path)
+
+        with profiling.span('convert_yaml_file.write_mind_map') as span:
+            with open(output_file_path, 'w', encoding='utf-8') as mm_file:
+                nodes = write_mind_map(data, mm_file, stable_ids)
+            span.count(nodes=nodes)
+        return nodes
+
+def validate_yaml_file(yaml_file_path):
+    """Check a YAML file against mindmap-schema.json and return every error found."""
+    try:
+        data = yaml_cache.load(yaml_file_path)
+    except yaml.YAMLError as e:
+        return [f"invalid YAML: {e}"]
+    return schema_errors(data, MINDMAP_SCHEMA)
+
+def file_digest(path):
+    """sha256 of a file's bytes."""
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+def load_manifest(output_dir):
+    try:
+        with open(Path(output_dir) / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_manifest(output_dir, manifest):
+    manifest_file = Path(output_dir) / MANIFEST_FILE
+    temporary = manifest_file.with_name(f'{MANIFEST_FILE}.{os.getpid()}.tmp')
+    temporary.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding='utf-8')
+    os.replace(temporary, manifest_file)
+
+def is_up_to_date(yaml_file, output_file, entry, digest, stable_ids):
+    """True if output_file is newer than yaml_file and was converted from the same content."""
+    try:
+        if os.stat(output_file).st_mtime_ns < os.stat(yaml_file).st_mtime_ns:
+            return False
+    except FileNotFoundError:
+        return False
+    return entry == {'sha256': digest, 'stable_ids': stable_ids}
+
+def _convert_job(yaml_file, output_file, stable_ids):
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    return convert_yaml_file(yaml_file, output_file, stable_ids)
+
+def convert_batch(patterns, output_dir, workers=None, stable_ids=False, force=False):
+    """Convert every YAML file matched by patterns into output_dir on a process pool.
+
+    Inputs whose .mm file is newer than the source and whose content hash matches the
+    manifest written by the previous run are skipped, unless force is set. Returns a
+    summary dict with the converted, skipped and failed files, the nodes written and
+    the elapsed time.
+    """
+    start = time.perf_counter()
+    manifest = load_manifest(output_dir)
+    summary = {'converted': [], 'skipped': [], 'failed': [], 'nodes': 0}
+    jobs = {}
+    for yaml_file, relative_name in collect_yaml_files(patterns, output_suffix='.mm'):
+        output_file = Path(output_dir) / relative_name.with_suffix('.mm')
+        name = relative_name.with_suffix('.mm').as_posix()
+        digest = file_digest(yaml_file)
+        if not force and is_up_to_date(yaml_file, output_file, manifest.get(name), digest, stable_ids):
+            summary['skipped'].append(output_file)
+            continue
+        jobs[name] = (yaml_file, output_file, digest)
+
+    if jobs:
+        workers = workers or os.cpu_count() or 1
+        with profiling.pool_executor(min(workers, len(jobs))) as executor:
+            futures = {executor.submit(_convert_job, yaml_file, output_file, stable_ids): name
+                       for name, (yaml_file, output_file, _) in jobs.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                yaml_file, output_file, digest = jobs[name]
+                try:
+                    summary['nodes'] += future.result()
+                except Exception as e:
+                    manifest.pop(name, None)
+                    summary['failed'].append((yaml_file, e))
+                    continue
+                manifest[name] = {'sha256': digest, 'stable_ids': stable_ids}
+                summary['converted'].append(output_file)
+        os.makedirs(output_dir, exist_ok=True)
+        save_manifest(output_dir, manifest)
+    summary['seconds'] = time.perf_counter() - start
+    return summary
+
+def format_throughput(summary):
+    seconds = max(summary['seconds'], 1e-9)
+    converted = len(summary['converted'])
+    return (f"Converted {converted} files ({summary['nodes']:,} nodes) in {summary['seconds']:.2f}s, "
+            f"{len(summary['skipped'])} up to date, {len(summary['failed'])} failed: "
+            f"{converted / seconds:.1f} files/s, {summary['nodes'] / seconds:,.0f} nodes/s")
 
-    # Create the base map element
-    map_elem = Element('map', {'version': '1.9.13'})
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert YAML files to Freeplane mind maps')
+    parser.add_argument('paths', nargs='+',
+                        help='YAML files, directories or glob patterns, followed by the output directory '
+                             'unless -o is given')
+    parser.add_argument('-o', '--output-dir', help='Output directory for the mind map files')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Number of worker processes (default: number of cores)')
+    parser.add_argument('--force', action='store_true',
+                        help='Convert every input, even if its mind map is up to date')
+    parser.add_argument('--validate-only', action='store_true',
+                        help='Check the inputs against mindmap-schema.json without converting them')
+    parser.add_argument('--stable-ids', action='store_true',
+                        help='Derive node IDs from the YAML keys so unchanged input gives an identical file')
+    parser.add_argument('--no-yaml-cache', action='store_true',
+                        help='Always parse the YAML instead of reusing the compiled copy of each unchanged file '
+                             'from the per-user cache')
+    profiling.add_arguments(parser)
 
-    # Add the root node and its children
-    add_node_recursive(map_elem, data['root'])
+    args = parser.parse_args(argv)
+    profiling.configure(args)
+    if args.no_yaml_cache:
+        yaml_cache.disable()
 
-    # Convert to string and pretty print
-    rough_string = tostring(map_elem, 'utf-8')
-    reparsed = minidom.parseString(rough_string)
-    pretty_xml = reparsed.toprettyxml(indent="    ")
+    inputs, output_dir = args.paths, args.output_dir
+    if output_dir is None and len(inputs) > 1 and Path(inputs[-1]).suffix not in YAML_SUFFIXES:
+        inputs, output_dir = inputs[:-1], inputs[-1]
 
-    # Add XML declaration
-    if not pretty_xml.startswith('<?xml'):
-        pretty_xml = '<?xml version="1.0" encoding="UTF-8"?>\n' + pretty_xml
+    if args.validate_only:
+        invalid = 0
+        for yaml_file, _ in collect_yaml_files(inputs):
+            errors = validate_yaml_file(yaml_file)
+            for error in errors:
+                print(f"{yaml_file}: {error}")
+            print(f"{yaml_file}: {'invalid' if errors else 'valid'}")
+            invalid += bool(errors)
+        sys.exit(1 if invalid else 0)
 
-    return pretty_xml
+    if output_dir is None:
+        if len(inputs) < 2:
+            parser.error('an output directory is required unless --validate-only is given')
+        inputs, output_dir = inputs[:-1], inputs[-1]
 
-def convert_yaml_file(yaml_file_path, output_file_path):
-    """Convert a YAML file to a Freeplane mind map file."""
-    with open(yaml_file_path, 'r', encoding='utf-8') as yaml_file:
-        yaml_content = yaml_file.read()
-    
-    mind_map_xml = converter(yaml_content)
-    
-    with open(output_file_path, 'w', encoding='utf-8') as mm_file:
-        mm_file.write(mind_map_xml)
+    summary = convert_batch(inputs, output_dir, args.jobs, args.stable_ids, args.force)
+    for yaml_file, error in summary['failed']:
+        print(f"Error converting {yaml_file}: {error}")
+    print(format_throughput(summary))
+    profiling.report()
+    sys.exit(1 if summary['failed'] else 0)
 
-# Example usage:
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description='Convert YAML file to Freeplane mind map')
-    parser.add_argument('input_file', help='Input YAML file path')
-    parser.add_argument('output_dir', help='Output directory for the mind map file')
-    
-    args = parser.parse_args()
-    
-    # Create output directory if it doesn't exist
-    os.makedirs(args.output_dir, exist_ok=True)
-    
-    # Generate output filename based on input filename
-    input_basename = os.path.splitext(os.path.basename(args.input_file))[0]
-    output_file = os.path.join(args.output_dir, f"{input_basename}.mm")
-    
-    convert_yaml_file(args.input_file, output_file)
\ No newline at end of file
+    main()
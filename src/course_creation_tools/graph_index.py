@@ -0,0 +1,124 @@
+from collections import deque
+
+DIRECTIONS = ('both', 'out', 'in')
+
+
+class GraphIndex:
+    """Adjacency and reverse-adjacency indexes over a parsed knowledge graph.
+
+    Built once per graph; neighbourhood, path and component queries then only visit the
+    part of the graph they return, so a focused view of a huge graph stays cheap. Edges
+    are kept as positions in data['relationships'] so parallel relationships survive.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.entities = {entity['id']: entity for entity in data['entities']}
+        self.entity_positions = {entity['id']: position for position, entity in enumerate(data['entities'])}
+        self.outgoing = {entity_id: [] for entity_id in self.entities}
+        self.incoming = {entity_id: [] for entity_id in self.entities}
+        for position, rel in enumerate(data['relationships']):
+            self.outgoing[rel['source']].append(position)
+            self.incoming[rel['target']].append(position)
+
+    def __contains__(self, entity_id):
+        return entity_id in self.entities
+
+    def __len__(self):
+        return len(self.entities)
+
+    def _check(self, entity_id):
+        if entity_id not in self.entities:
+            raise KeyError(f"unknown entity {entity_id!r}")
+
+    def neighbours(self, entity_id, direction='both'):
+        """Yield the ids one relationship away from entity_id (targets for 'out', sources for 'in')."""
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}, not {direction!r}")
+        relationships = self.data['relationships']
+        if direction in ('both', 'out'):
+            for position in self.outgoing[entity_id]:
+                yield relationships[position]['target']
+        if direction in ('both', 'in'):
+            for position in self.incoming[entity_id]:
+                yield relationships[position]['source']
+
+    def ego_ids(self, centres, hops=1, direction='both'):
+        """Return {id: distance} for every entity within hops relationships of any of the centres."""
+        distances = {}
+        frontier = deque()
+        for centre in centres:
+            self._check(centre)
+            distances[centre] = 0
+            frontier.append(centre)
+        while frontier:
+            entity_id = frontier.popleft()
+            distance = distances[entity_id]
+            if distance == hops:
+                continue
+            for neighbour in self.neighbours(entity_id, direction):
+                if neighbour not in distances:
+                    distances[neighbour] = distance + 1
+                    frontier.append(neighbour)
+        return distances
+
+    def subgraph(self, entity_ids):
+        """Return a graph dict with the given entities and the relationships between them, in file order."""
+        keep = set(entity_ids)
+        entities, relationships = self.data['entities'], self.data['relationships']
+        entity_positions = sorted(self.entity_positions[entity_id] for entity_id in keep)
+        positions = sorted(position for entity_id in keep for position in self.outgoing[entity_id]
+                           if relationships[position]['target'] in keep)
+        return {
+            'entities': [entities[position] for position in entity_positions],
+            'relationships': [relationships[position] for position in positions],
+        }
+
+    def ego_graph(self, centres, hops=1, direction='both'):
+        """The subgraph of everything within hops relationships of the centres (a str is one centre)."""
+        if isinstance(centres, str):
+            centres = [centres]
+        return self.subgraph(self.ego_ids(centres, hops, direction))
+
+    def shortest_path(self, source, target, direction='out'):
+        """Return the ids on a shortest path from source to target, or None if there is none.
+
+        direction='out' follows relationships from source to target; 'both' ignores their direction.
+        """
+        self._check(source)
+        self._check(target)
+        previous = {source: None}
+        frontier = deque([source])
+        while frontier:
+            entity_id = frontier.popleft()
+            if entity_id == target:
+                path = []
+                while entity_id is not None:
+                    path.append(entity_id)
+                    entity_id = previous[entity_id]
+                return path[::-1]
+            for neighbour in self.neighbours(entity_id, direction):
+                if neighbour not in previous:
+                    previous[neighbour] = entity_id
+                    frontier.append(neighbour)
+        return None
+
+    def connected_components(self):
+        """Return the weakly connected components as lists of ids, largest first."""
+        seen = set()
+        components = []
+        for start in self.entities:
+            if start in seen:
+                continue
+            seen.add(start)
+            component = [start]
+            frontier = deque([start])
+            while frontier:
+                for neighbour in self.neighbours(frontier.popleft()):
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        component.append(neighbour)
+                        frontier.append(neighbour)
+            components.append(component)
+        components.sort(key=len, reverse=True)
+        return components
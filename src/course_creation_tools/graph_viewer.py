@@ -0,0 +1,304 @@
+import html
+import json
+import re
+
+# Points per inch: Graphviz reports node sizes in inches and positions in points
+POINTS_PER_INCH = 72
+PLACEHOLDER = re.compile(r'__(TITLE|PAYLOAD|DESCRIPTIONS)__')
+
+
+def _points(pos):
+    return [float(value) for value in pos.split(',')]
+
+
+def viewer_payload(layout):
+    """Turn a Graphviz json0 layout into the compact payload drawn by the viewer page.
+
+    Coordinates are flipped so y grows downwards, as on a canvas. Node and edge lists are
+    plain arrays to keep the page small; descriptions are returned separately. Both are
+    embedded in the page, but the page only parses the descriptions when a tooltip is first
+    needed.
+    """
+    left, bottom, right, top = _points(layout['bb'])
+    nodes = []
+    descriptions = []
+    node_index = {}
+    for obj in layout.get('objects', []):
+        if 'pos' not in obj:  # clusters and subgraphs have no position of their own
+            continue
+        x, y = _points(obj['pos'])
+        node_index[obj['_gvid']] = len(nodes)
+        nodes.append([
+            round(x - left, 2), round(top - y, 2),
+            round(float(obj['width']) * POINTS_PER_INCH, 2),
+            round(float(obj['height']) * POINTS_PER_INCH, 2),
+            obj.get('label', obj['name']),
+        ])
+        descriptions.append(obj.get('tooltip', ''))
+
+    edges = []
+    for edge in layout.get('edges', []):
+        spline, arrow = [], None
+        for token in edge.get('pos', '').split():
+            if token.startswith('e,'):
+                arrow = _points(token[2:])
+            elif not token.startswith('s,'):
+                spline.extend(_points(token))
+        # Flatten to [x0, y0, x1, y1, ...] in viewer coordinates
+        flat = []
+        for x, y in zip(spline[::2], spline[1::2]):
+            flat.extend((round(x - left, 2), round(top - y, 2)))
+        label, label_x, label_y = edge.get('label', ''), None, None
+        if 'lp' in edge:
+            label_x, label_y = _points(edge['lp'])
+            label_x, label_y = round(label_x - left, 2), round(top - label_y, 2)
+        edges.append([
+            node_index.get(edge['tail']), node_index.get(edge['head']), flat,
+            [round(arrow[0] - left, 2), round(top - arrow[1], 2)] if arrow else None,
+            label, label_x, label_y,
+        ])
+
+    return {
+        'width': round(right - left, 2),
+        'height': round(top - bottom, 2),
+        'nodes': nodes,
+        'edges': edges,
+    }, descriptions
+
+
+def _script_json(value):
+    # With no '<' at all, neither '</script>' nor '<!--' in a string can end the script element
+    return json.dumps(value, separators=(',', ':')).replace('<', '\\u003c')
+
+
+def viewer_html(payload, descriptions, title='Knowledge Graph Visualization'):
+    """Return a self-contained HTML page that draws the payload on a pannable, zoomable canvas."""
+    values = {
+        'TITLE': html.escape(title),
+        'PAYLOAD': _script_json(payload),
+        'DESCRIPTIONS': _script_json(descriptions),
+    }
+    # One pass, so placeholder text inside the graph data is never replaced itself
+    return PLACEHOLDER.sub(lambda match: values[match.group(1)], VIEWER_TEMPLATE)
+
+
+VIEWER_TEMPLATE = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>__TITLE__</title>
+    <style>
+        html, body {
+            margin: 0;
+            height: 100%;
+            overflow: hidden;
+            font-family: Arial, sans-serif;
+            background-color: #f5f5f5;
+        }
+        #graph {
+            display: block;
+            width: 100%;
+            height: 100%;
+            cursor: grab;
+        }
+        #tooltip {
+            position: absolute;
+            display: none;
+            max-width: 320px;
+            padding: 8px;
+            background-color: white;
+            border-radius: 4px;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.2);
+            pointer-events: none;
+        }
+    </style>
+</head>
+<body>
+    <canvas id="graph"></canvas>
+    <div id="tooltip"></div>
+    <script type="application/json" id="graph-data">__PAYLOAD__</script>
+    <script type="application/json" id="graph-descriptions">__DESCRIPTIONS__</script>
+    <script>
+    (function() {
+        const graph = JSON.parse(document.getElementById('graph-data').textContent);
+        const canvas = document.getElementById('graph');
+        const context = canvas.getContext('2d');
+        const tooltip = document.getElementById('tooltip');
+        const CELL = 256;  // size of a spatial index cell in graph points
+        let descriptions = null;  // parsed on the first hover
+        let scale = 1, offsetX = 0, offsetY = 0, pending = false, stamp = 0;
+
+        // Spatial grid: every node and edge is listed in each cell its bounding box touches
+        const grid = new Map();
+        function addToGrid(item, minX, minY, maxX, maxY) {
+            for (let cx = Math.floor(minX / CELL); cx <= Math.floor(maxX / CELL); cx++) {
+                for (let cy = Math.floor(minY / CELL); cy <= Math.floor(maxY / CELL); cy++) {
+                    const key = cx + ',' + cy;
+                    if (!grid.has(key)) grid.set(key, []);
+                    grid.get(key).push(item);
+                }
+            }
+        }
+        graph.nodes.forEach(function(node, index) {
+            addToGrid({kind: 'node', index: index, seen: 0},
+                      node[0] - node[2] / 2, node[1] - node[3] / 2, node[0] + node[2] / 2, node[1] + node[3] / 2);
+        });
+        graph.edges.forEach(function(edge, index) {
+            const xs = edge[2].filter(function(_, i) { return i % 2 === 0; });
+            const ys = edge[2].filter(function(_, i) { return i % 2 === 1; });
+            if (edge[3]) { xs.push(edge[3][0]); ys.push(edge[3][1]); }
+            if (edge[5] !== null) { xs.push(edge[5]); ys.push(edge[6]); }
+            if (xs.length) {
+                addToGrid({kind: 'edge', index: index, seen: 0},
+                          Math.min.apply(null, xs), Math.min.apply(null, ys), Math.max.apply(null, xs), Math.max.apply(null, ys));
+            }
+        });
+
+        function visibleItems() {
+            const minX = -offsetX / scale, minY = -offsetY / scale;
+            const maxX = (canvas.width - offsetX) / scale, maxY = (canvas.height - offsetY) / scale;
+            const items = [];
+            stamp++;
+            for (let cx = Math.floor(minX / CELL); cx <= Math.floor(maxX / CELL); cx++) {
+                for (let cy = Math.floor(minY / CELL); cy <= Math.floor(maxY / CELL); cy++) {
+                    const cell = grid.get(cx + ',' + cy);
+                    if (!cell) continue;
+                    for (const item of cell) {
+                        if (item.seen !== stamp) { item.seen = stamp; items.push(item); }
+                    }
+                }
+            }
+            return items;
+        }
+
+        function drawEdge(edge, showLabels) {
+            const points = edge[2];
+            if (points.length >= 2) {
+                context.beginPath();
+                context.moveTo(points[0], points[1]);
+                for (let i = 2; i + 5 < points.length; i += 6) {
+                    context.bezierCurveTo(points[i], points[i + 1], points[i + 2], points[i + 3], points[i + 4], points[i + 5]);
+                }
+                context.stroke();
+            }
+            if (edge[3] && points.length >= 2) {
+                const baseX = points[points.length - 2], baseY = points[points.length - 1];
+                const angle = Math.atan2(edge[3][1] - baseY, edge[3][0] - baseX);
+                const length = Math.hypot(edge[3][0] - baseX, edge[3][1] - baseY);
+                context.beginPath();
+                context.moveTo(edge[3][0], edge[3][1]);
+                context.lineTo(baseX + Math.cos(angle + Math.PI / 2) * length / 3, baseY + Math.sin(angle + Math.PI / 2) * length / 3);
+                context.lineTo(baseX + Math.cos(angle - Math.PI / 2) * length / 3, baseY + Math.sin(angle - Math.PI / 2) * length / 3);
+                context.closePath();
+                context.fill();
+            }
+            if (showLabels && edge[4] && edge[5] !== null) {
+                context.fillText(edge[4], edge[5], edge[6]);
+            }
+        }
+
+        function draw() {
+            pending = false;
+            context.setTransform(1, 0, 0, 1, 0, 0);
+            context.clearRect(0, 0, canvas.width, canvas.height);
+            context.setTransform(scale, 0, 0, scale, offsetX, offsetY);
+            context.lineWidth = 1 / Math.max(scale, 1);
+            context.textAlign = 'center';
+            context.textBaseline = 'middle';
+            // Level of detail: skip text that would be too small to read
+            const showLabels = scale * 14 >= 5;
+            const items = visibleItems();
+
+            context.strokeStyle = 'black';
+            context.fillStyle = 'black';
+            context.font = '14px Arial';
+            for (const item of items) {
+                if (item.kind === 'edge') drawEdge(graph.edges[item.index], showLabels);
+            }
+            context.font = '16px Arial';
+            for (const item of items) {
+                if (item.kind !== 'node') continue;
+                const node = graph.nodes[item.index];
+                context.fillStyle = 'lightblue';
+                context.fillRect(node[0] - node[2] / 2, node[1] - node[3] / 2, node[2], node[3]);
+                context.strokeRect(node[0] - node[2] / 2, node[1] - node[3] / 2, node[2], node[3]);
+                if (showLabels) {
+                    context.fillStyle = 'black';
+                    context.fillText(node[4], node[0], node[1]);
+                }
+            }
+        }
+
+        function redraw() {
+            if (!pending) { pending = true; requestAnimationFrame(draw); }
+        }
+
+        function resize() {
+            canvas.width = canvas.clientWidth;
+            canvas.height = canvas.clientHeight;
+            redraw();
+        }
+
+        function nodeAt(screenX, screenY) {
+            const x = (screenX - offsetX) / scale, y = (screenY - offsetY) / scale;
+            const cell = grid.get(Math.floor(x / CELL) + ',' + Math.floor(y / CELL)) || [];
+            for (const item of cell) {
+                if (item.kind !== 'node') continue;
+                const node = graph.nodes[item.index];
+                if (Math.abs(x - node[0]) <= node[2] / 2 && Math.abs(y - node[1]) <= node[3] / 2) return item.index;
+            }
+            return null;
+        }
+
+        let dragging = null;
+        canvas.addEventListener('mousedown', function(event) {
+            dragging = {x: event.clientX - offsetX, y: event.clientY - offsetY};
+            canvas.style.cursor = 'grabbing';
+        });
+        window.addEventListener('mouseup', function() {
+            dragging = null;
+            canvas.style.cursor = 'grab';
+        });
+        canvas.addEventListener('mousemove', function(event) {
+            if (dragging) {
+                offsetX = event.clientX - dragging.x;
+                offsetY = event.clientY - dragging.y;
+                tooltip.style.display = 'none';
+                redraw();
+                return;
+            }
+            const index = nodeAt(event.clientX, event.clientY);
+            if (index === null) {
+                tooltip.style.display = 'none';
+                return;
+            }
+            if (descriptions === null) {
+                descriptions = JSON.parse(document.getElementById('graph-descriptions').textContent);
+            }
+            tooltip.textContent = descriptions[index];
+            tooltip.style.left = (event.clientX + 12) + 'px';
+            tooltip.style.top = (event.clientY + 12) + 'px';
+            tooltip.style.display = descriptions[index] ? 'block' : 'none';
+        });
+        canvas.addEventListener('wheel', function(event) {
+            event.preventDefault();
+            const factor = Math.exp(-event.deltaY * 0.001);
+            offsetX = event.clientX - (event.clientX - offsetX) * factor;
+            offsetY = event.clientY - (event.clientY - offsetY) * factor;
+            scale *= factor;
+            redraw();
+        }, {passive: false});
+        window.addEventListener('resize', resize);
+
+        resize();
+        // Start with the whole graph in view
+        scale = Math.min(canvas.width / graph.width, canvas.height / graph.height, 1) || 1;
+        offsetX = (canvas.width - graph.width * scale) / 2;
+        offsetY = (canvas.height - graph.height * scale) / 2;
+        redraw();
+    })();
+    </script>
+</body>
+</html>
+'''
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import time
+
+from . import yaml_cache
+
+
+def graph_fingerprint(yaml_file):
+    """Hash of the parsed entities and relationships, ignoring comments, formatting and key order."""
+    data = yaml_cache.load(yaml_file) or {}
+    content = {
+        'entities': data.get('entities'),
+        'relationships': data.get('relationships'),
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class GraphWatcher:
+    """Poll a set of YAML files and re-render the ones whose graph content changed.
+
+    collect() returns (yaml_file, relative_name) pairs and is called on every poll, so
+    new files are picked up. render(yaml_file, relative_name) is called for each file that
+    changed, once its modification time has been stable for `debounce` seconds.
+    """
+
+    def __init__(self, collect, render, debounce=0.5, interval=0.25, clock=time.monotonic):
+        self.collect = collect
+        self.render = render
+        self.debounce = debounce
+        self.interval = interval
+        self.clock = clock
+        self.stats = {}         # yaml_file -> (mtime_ns, size) at the last poll
+        self.fingerprints = {}  # yaml_file -> fingerprint of the last render
+        self.pending = {}       # yaml_file -> (relative_name, time the last change was seen)
+
+    def poll(self):
+        """Check every file once and render the settled changes. Returns the files rendered."""
+        now = self.clock()
+        current = {}
+        for yaml_file, relative_name in self.collect():
+            try:
+                stat = os.stat(yaml_file)
+            except FileNotFoundError:
+                continue
+            current[yaml_file] = (stat.st_mtime_ns, stat.st_size)
+            if self.stats.get(yaml_file) != current[yaml_file]:
+                self.pending[yaml_file] = (relative_name, now)
+
+        # Forget files that have been deleted
+        for yaml_file in set(self.stats) - set(current):
+            self.fingerprints.pop(yaml_file, None)
+            self.pending.pop(yaml_file, None)
+        self.stats = current
+
+        rendered = []
+        for yaml_file, (relative_name, changed_at) in list(self.pending.items()):
+            if now - changed_at < self.debounce:
+                continue
+            del self.pending[yaml_file]
+            try:
+                fingerprint = graph_fingerprint(yaml_file)
+                if self.fingerprints.get(yaml_file) == fingerprint:
+                    continue
+                self.render(yaml_file, relative_name)
+            except Exception as e:
+                # Half-written or invalid files must not stop the watcher
+                print(f"Error rendering {yaml_file}: {e}")
+                continue
+            self.fingerprints[yaml_file] = fingerprint
+            rendered.append(yaml_file)
+        return rendered
+
+    def run(self):
+        """Poll until interrupted with Ctrl-C."""
+        try:
+            while True:
+                self.poll()
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,334 @@
+import atexit
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+# Set to an output file (or 1 for profile.json) to profile any run without the --profile flag
+ENV_VAR = 'COURSE_TOOLS_PROFILE'
+# Comma separated span names to run under cProfile as well
+STAGES_ENV_VAR = 'COURSE_TOOLS_PROFILE_STAGES'
+# Set to 1 to record peak memory as well; tracemalloc slows Python code down several times
+MEMORY_ENV_VAR = 'COURSE_TOOLS_PROFILE_MEMORY'
+DEFAULT_OUTPUT = 'profile.json'
+
+
+class Span:
+    """One timed stage. Counts (nodes, edges, frames, bytes...) can be added while it runs."""
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.counts = {}
+        self.peak = 0
+
+    def count(self, **counts):
+        for key, value in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + value
+
+
+class _DisabledSpan:
+    def count(self, **counts):
+        pass
+
+
+_DISABLED_SPAN = _DisabledSpan()
+
+
+class Profiler:
+    """Collects spans as Chrome trace events (open the output in chrome://tracing or Perfetto).
+
+    Each span records wall time, the CPU time of its thread and its counts. With memory set it
+    also records the peak Python memory allocated while it ran, through tracemalloc, which
+    makes the profiled code itself several times slower.
+    """
+
+    def __init__(self, output_file=DEFAULT_OUTPUT, cprofile_stages=(), memory=False, origin=None):
+        self.output_file = Path(output_file)
+        self.cprofile_stages = set(cprofile_stages)
+        self.memory = memory
+        self.records = []
+        self.totals = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        # perf_counter is system wide, so pool workers given the parent's origin share its timeline
+        self.origin = time.perf_counter() if origin is None else origin
+        self.cprofile_active = False
+        self.profiles = {}
+        self.worker_files = set()
+        self.started_tracemalloc = memory and not tracemalloc.is_tracing()
+        if self.started_tracemalloc:
+            tracemalloc.start()
+
+    def _stack(self):
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    @contextlib.contextmanager
+    def span(self, name, **args):
+        stack = self._stack()
+        current = 0
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # reset_peak() below would lose the peak the enclosing span has reached so far
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+        span = Span(name, args)
+        stack.append(span)
+        profile = self._start_cprofile(name)
+        start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            yield span
+        finally:
+            wall, cpu = time.perf_counter() - start, time.thread_time() - cpu_start
+            if profile is not None:
+                profile.disable()
+                self.cprofile_active = False
+            stack.pop()
+            if self.memory:
+                span.peak = max(span.peak, tracemalloc.get_traced_memory()[1])
+                if stack:
+                    stack[-1].peak = max(stack[-1].peak, span.peak)
+            self._record(span, start, wall, cpu, span.peak - current if self.memory else None)
+
+    def _start_cprofile(self, name):
+        # Only one cProfile profiler can run at a time, so nested stages are not profiled separately
+        if name not in self.cprofile_stages or self.cprofile_active:
+            return None
+        self.cprofile_active = True
+        profile = self.profiles.setdefault(name, cProfile.Profile())
+        profile.enable()
+        return profile
+
+    def _record(self, span, start, wall, cpu, peak_memory):
+        args = {**span.args, 'cpu_ms': round(cpu * 1e3, 3)}
+        if peak_memory is not None:
+            args['peak_memory_bytes'] = max(peak_memory, 0)
+        event = {
+            'name': span.name,
+            'cat': span.name.split('.')[0],
+            'ph': 'X',
+            'ts': round((start - self.origin) * 1e6, 3),
+            'dur': round(wall * 1e6, 3),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': {**args, **span.counts},
+        }
+        self.merge([(event, span.counts)])
+
+    def merge(self, records, worker_files=()):
+        """Add (event, counts) records, such as the ones a pool worker sent back, to the trace and totals."""
+        with self.lock:
+            self.records.extend(records)
+            self.worker_files.update(worker_files)
+            for event, counts in records:
+                total = self.totals.setdefault(event['name'], {'calls': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0})
+                total['calls'] += 1
+                total['wall_ms'] += event['dur'] / 1e3
+                total['cpu_ms'] += event['args']['cpu_ms']
+                if 'peak_memory_bytes' in event['args']:
+                    total['peak_memory_bytes'] = max(total.get('peak_memory_bytes', 0),
+                                                     event['args']['peak_memory_bytes'])
+                for key, value in counts.items():
+                    total[key] = total.get(key, 0) + value
+
+    def take_records(self):
+        """Return the records collected so far and start a new list."""
+        with self.lock:
+            records, self.records = self.records, []
+        return records
+
+    def summary(self):
+        """Return {name: {'calls', 'wall_ms', 'cpu_ms', ['peak_memory_bytes'], counts...}} totals per span name."""
+        with self.lock:
+            return {name: dict(total) for name, total in self.totals.items()}
+
+    def write_profiles(self, suffix=''):
+        """Write a <output>.<stage><suffix>.prof file for each cProfile'd stage. Returns the files."""
+        written = []
+        for name, profile in self.profiles.items():
+            stats_file = self.output_file.with_name(f'{self.output_file.stem}.{name}{suffix}.prof')
+            stats_file.parent.mkdir(parents=True, exist_ok=True)
+            profile.dump_stats(stats_file)
+            written.append(stats_file)
+        return written
+
+    def write(self):
+        """Write the trace, and the .prof file of each cProfile'd stage. Returns the files, including
+        the .prof files pool workers wrote."""
+        self.output_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.output_file, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': [event for event, _ in self.records], 'displayTimeUnit': 'ms'}, f)
+        return [self.output_file, *self.write_profiles(), *sorted(self.worker_files)]
+
+
+_profiler = None
+
+
+def enable(output_file=DEFAULT_OUTPUT, cprofile_stages=(), memory=False):
+    """Start recording spans; the trace is written when disable() is called or the process exits.
+
+    memory also records the peak memory of each span, at the cost of running under tracemalloc.
+    """
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler(output_file, cprofile_stages, memory)
+        atexit.register(disable)
+    return _profiler
+
+
+def disable():
+    """Stop recording and write the trace. Returns the files written (empty if profiling was off)."""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is None:
+        return []
+    atexit.unregister(disable)
+    if profiler.started_tracemalloc:
+        tracemalloc.stop()
+    return profiler.write()
+
+
+def is_enabled():
+    return _profiler is not None
+
+
+def span(name, **args):
+    """Context manager timing one stage; yields a Span whose count() adds item counts.
+
+    args (a backend name, a format...) are stored with the span. Costs next to nothing
+    when profiling is off.
+    """
+    if _profiler is None:
+        return contextlib.nullcontext(_DISABLED_SPAN)
+    return _profiler.span(name, **args)
+
+
+def profiled(name):
+    """Decorator running every call of a function in a span."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _start_worker(output_file, cprofile_stages, memory, origin):
+    global _profiler
+    _profiler = Profiler(output_file, cprofile_stages, memory, origin)
+
+
+def _run_in_worker(function, args, kwargs):
+    """Run one job in a pool worker and return its outcome with the spans it recorded.
+
+    cProfile'd stages are written by each worker to <output>.<stage>.<pid>.prof.
+    """
+    try:
+        outcome = (True, function(*args, **kwargs))
+    except Exception as e:
+        outcome = (False, e)
+    return outcome, _profiler.take_records(), _profiler.write_profiles(f'.{os.getpid()}')
+
+
+class _ProfiledPoolExecutor:
+    """A process pool whose workers profile their jobs and send the spans back with each result,
+    so the trace shows the real parallel run with one track per worker process."""
+
+    def __init__(self, profiler, max_workers):
+        self.profiler = profiler
+        self.executor = ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_start_worker,
+            initargs=(profiler.output_file, tuple(profiler.cprofile_stages), profiler.memory, profiler.origin))
+
+    def submit(self, function, *args, **kwargs):
+        future = Future()
+        self.executor.submit(_run_in_worker, function, args, kwargs).add_done_callback(
+            functools.partial(self._finish, future))
+        return future
+
+    def _finish(self, future, worker_future):
+        try:
+            (succeeded, value), records, worker_files = worker_future.result()
+        except BaseException as e:  # the pool broke or the result could not be sent back
+            future.set_exception(e)
+            return
+        self.profiler.merge(records, worker_files)
+        if succeeded:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        return False
+
+
+def pool_executor(max_workers):
+    """The process pool batches run their jobs on. While profiling, each worker records its own
+    spans and they are merged into this process's trace as the jobs finish."""
+    if _profiler is None:
+        return ProcessPoolExecutor(max_workers=max_workers)
+    return _ProfiledPoolExecutor(_profiler, max_workers)
+
+
+def add_arguments(parser):
+    """Add --profile, --profile-stage and --profile-memory to a command line parser."""
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_OUTPUT, metavar='FILE',
+                        help=f'Record per-stage timings as a Chrome trace (default file: {DEFAULT_OUTPUT}); '
+                             f'the {ENV_VAR} environment variable does the same')
+    parser.add_argument('--profile-stage', action='append', default=[], metavar='NAME',
+                        help='Also run this stage under cProfile, writing <trace>.<NAME>.prof (repeatable)')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help=f'Also record the peak memory of each stage through tracemalloc, which slows '
+                             f'the run down several times (or set {MEMORY_ENV_VAR}=1)')
+
+
+def configure(args=None):
+    """Enable profiling from parsed --profile arguments or, failing that, the environment."""
+    output_file = getattr(args, 'profile', None)
+    stages = list(getattr(args, 'profile_stage', []) or [])
+    if output_file is None:
+        value = os.environ.get(ENV_VAR, '')
+        if value in ('', '0'):
+            return None
+        output_file = DEFAULT_OUTPUT if value == '1' else value
+    stages += [stage for stage in os.environ.get(STAGES_ENV_VAR, '').split(',') if stage]
+    memory = getattr(args, 'profile_memory', False) or os.environ.get(MEMORY_ENV_VAR, '0') not in ('', '0')
+    return enable(output_file, stages, memory)
+
+
+def print_summary(file=None):
+    """Print the span totals recorded so far, slowest first."""
+    if _profiler is None:
+        return
+    totals = sorted(_profiler.summary().items(), key=lambda item: item[1]['wall_ms'], reverse=True)
+    for name, total in totals:
+        counts = ', '.join(f'{key}={value:,}' for key, value in total.items()
+                           if key not in ('calls', 'wall_ms', 'cpu_ms', 'peak_memory_bytes'))
+        memory = f" {total['peak_memory_bytes'] / 2**20:>8.1f} MB peak" if 'peak_memory_bytes' in total else ''
+        print(f"{name:<32} {total['calls']:>5}x {total['wall_ms']:>10.1f} ms wall {total['cpu_ms']:>10.1f} ms cpu"
+              f"{memory}" + (f"  {counts}" if counts else ''), file=file)
+
+
+def report():
+    """Print the span totals, then stop profiling and write the trace. Does nothing when profiling is off."""
+    if _profiler is None:
+        return
+    print_summary()
+    print(f"Profile written to {', '.join(map(str, disable()))}")
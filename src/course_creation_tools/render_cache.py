@@ -0,0 +1,133 @@
+import filecmp
+import functools
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+import graphviz
+
+try:
+    import fcntl
+except ImportError:  # Windows: counters are updated without a lock
+    fcntl = None
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+STATS_FILE = 'stats.json'
+LOCK_FILE = 'stats.lock'
+
+
+@functools.lru_cache(maxsize=None)
+def graphviz_version():
+    """Return the output of `dot -V` (run once per process).
+
+    The whole line is kept rather than just the version number, as it also names the build,
+    and two builds of one release can lay a graph out differently.
+    """
+    try:
+        result = subprocess.run(['dot', '-V'], capture_output=True, check=True)
+    except FileNotFoundError:
+        raise graphviz.ExecutableNotFound(['dot', '-V']) from None
+    # dot prints its version on stderr
+    return (result.stderr or result.stdout).decode(errors='replace').strip()
+
+
+class RenderCache:
+    """On-disk cache of rendered graphs, keyed on the DOT source, Graphviz build, backend and output format.
+
+    Entries are evicted least-recently-used first once the cache grows past max_bytes.
+    Hit and miss counters are kept in stats.json inside the cache directory so they
+    accumulate across runs and across the worker processes of a batch.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def key(self, source, fmt, engine='dot', backend='subprocess', prelayout=False):
+        """Content address for rendering source with the given engine, backend and format.
+
+        prelayout marks files drawn by `neato -n2` from the positioned output of the engine,
+        which are cached apart from files the engine drew itself.
+        """
+        digest = hashlib.sha256()
+        path = 'prelayout' if prelayout else 'direct'
+        for part in (graphviz_version(), backend, path, engine, fmt, source):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _entry(self, key, fmt):
+        return self.directory / f'{key}.{fmt}'
+
+    def fetch(self, key, fmt, destination):
+        """Copy a cached render to destination. Returns False on a cache miss."""
+        entry = self._entry(key, fmt)
+        try:
+            # Touch the entry so eviction sees it as recently used
+            os.utime(entry)
+        except FileNotFoundError:
+            self._count('misses')
+            return False
+        destination = Path(destination)
+        if not (destination.exists() and filecmp.cmp(entry, destination, shallow=False)):
+            shutil.copyfile(entry, destination)
+        self._count('hits')
+        return True
+
+    def store(self, key, fmt, rendered_file):
+        """Add a freshly rendered file to the cache and evict old entries if needed."""
+        entry = self._entry(key, fmt)
+        temporary = entry.with_name(f'{entry.name}.{os.getpid()}.tmp')
+        shutil.copyfile(rendered_file, temporary)
+        os.replace(temporary, entry)
+        self.evict()
+
+    def entries(self):
+        return [path for path in self.directory.iterdir()
+                if path.is_file() and path.name not in (STATS_FILE, LOCK_FILE) and not path.name.endswith('.tmp')]
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for path in self.entries():
+            try:
+                entries.append((path.stat(), path))
+            except FileNotFoundError:  # evicted by another process
+                continue
+        total = sum(stat.st_size for stat, _ in entries)
+        for stat, path in sorted(entries, key=lambda entry: entry[0].st_mtime):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+
+    def _count(self, counter):
+        with open(self.directory / LOCK_FILE, 'a') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            stats = self._read_stats()
+            stats[counter] = stats.get(counter, 0) + 1
+            temporary = self.directory / f'{STATS_FILE}.{os.getpid()}.tmp'
+            temporary.write_text(json.dumps(stats))
+            os.replace(temporary, self.directory / STATS_FILE)
+
+    def _read_stats(self):
+        try:
+            return json.loads((self.directory / STATS_FILE).read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def stats(self):
+        """Return hit/miss counters plus the current number of entries and their total size."""
+        stats = self._read_stats()
+        entries = self.entries()
+        return {
+            'hits': stats.get('hits', 0),
+            'misses': stats.get('misses', 0),
+            'entries': len(entries),
+            'bytes': sum(path.stat().st_size for path in entries),
+        }
@@ -0,0 +1,29 @@
+import functools
+import json
+from pathlib import Path
+
+from jsonschema.validators import validator_for
+
+SCHEMA_DIR = Path(__file__).resolve().parents[2]
+KNOWLEDGE_GRAPH_SCHEMA = SCHEMA_DIR / 'knowledge_graph_schema.json'
+MINDMAP_SCHEMA = SCHEMA_DIR / 'mindmap-schema.json'
+
+
+@functools.lru_cache(maxsize=None)
+def compiled_validator(schema_file):
+    """Load and check a JSON schema once; the validator is reused for every document in the process."""
+    with open(schema_file, 'r', encoding='utf-8') as f:
+        schema = json.load(f)
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
+
+def schema_errors(data, schema_file):
+    """Return every schema violation in data as 'path: message' strings (empty if valid)."""
+    validator = compiled_validator(str(schema_file))
+    errors = []
+    for error in validator.iter_errors(data):
+        location = '/'.join(str(part) for part in error.absolute_path) or '<root>'
+        errors.append(f"{location}: {error.message}")
+    return errors
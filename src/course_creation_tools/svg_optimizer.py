@@ -0,0 +1,196 @@
+import argparse
+import gzip
+import re
+from collections import Counter
+from pathlib import Path
+from xml.etree import ElementTree
+
+SVG_NS = 'http://www.w3.org/2000/svg'
+XLINK_NS = 'http://www.w3.org/1999/xlink'
+# Editor namespaces whose elements and attributes a browser never looks at
+EDITOR_NAMESPACES = (
+    'http://www.inkscape.org/namespaces/inkscape',
+    'http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd',
+    'http://purl.org/dc/elements/1.1/',
+    'http://creativecommons.org/ns#',
+    'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
+)
+# Prefixes written for these namespaces; SVG is the default namespace
+SVG_PREFIXES = {SVG_NS: '', XLINK_NS: 'xlink'}
+# Ids the brain animation scripts look up with getElementById
+DEFAULT_KEEP_IDS = ('sfg', 'sfg-text')
+# Attributes holding coordinates or lengths that can safely be rounded
+NUMERIC_ATTRIBUTES = {
+    'x', 'y', 'x1', 'y1', 'x2', 'y2', 'cx', 'cy', 'r', 'rx', 'ry', 'dx', 'dy',
+    'width', 'height', 'viewBox', 'points', 'd', 'transform', 'style',
+    'stdDeviation', 'font-size', 'stroke-width', 'opacity', 'fill-opacity', 'stroke-opacity',
+}
+# Elements whose text content is significant, including whitespace
+TEXT_ELEMENTS = {f'{{{SVG_NS}}}{tag}' for tag in ('text', 'tspan', 'textPath', 'title', 'desc', 'style', 'script')}
+NUMBER = re.compile(r'-?\d*\.\d+(?:[eE][-+]?\d+)?')
+ID_REFERENCE = re.compile(r'url\(#([^)]+)\)')
+ID_SELECTOR = re.compile(r'#([A-Za-z_][\w-]*)')
+# Innermost { ... } declaration blocks of a stylesheet, leaving the selectors
+DECLARATIONS = re.compile(r'\{[^{}]*\}')
+
+
+def _namespace(name):
+    return name[1:].split('}')[0] if name.startswith('{') else None
+
+
+def _round_numbers(value, precision):
+    def shorten(match):
+        text = f"{float(match.group()):.{precision}f}".rstrip('0').rstrip('.')
+        text = '0' if text in ('-0', '') else text
+        # In compact path data "0.0001.5" is two numbers; "0" + ".5" would read back as one
+        if '.' not in text and value.startswith('.', match.end()):
+            text += ' '
+        return text
+    return NUMBER.sub(shorten, value)
+
+
+def _selector_ids(stylesheet):
+    """Ids a <style> element refers to, in #id selectors or url(#id) values."""
+    return set(ID_SELECTOR.findall(DECLARATIONS.sub('', stylesheet))) | set(ID_REFERENCE.findall(stylesheet))
+
+
+def serialize_svg(root, prefixes=SVG_PREFIXES, xml_declaration=False):
+    """Write the tree with the given {namespace: prefix} prefixes ('' for the default namespace).
+
+    Prefixes are written out here rather than with ElementTree.register_namespace, which would
+    change how every other user of ElementTree in the process serializes these namespaces.
+    Namespaces missing from prefixes are left to ElementTree. The tree is modified in place.
+    """
+    used = set()
+
+    def prefixed(name):
+        namespace = _namespace(name)
+        if namespace not in prefixes:
+            return name
+        used.add(namespace)
+        local_name = name.split('}', 1)[1]
+        return f'{prefixes[namespace]}:{local_name}' if prefixes[namespace] else local_name
+
+    for element in root.iter():
+        if isinstance(element.tag, str):
+            element.tag = prefixed(element.tag)
+        for name in [name for name in element.attrib if _namespace(name) in prefixes]:
+            element.set(prefixed(name), element.attrib.pop(name))
+    if root.tag == 'svg':
+        used.add(SVG_NS)
+    # Namespace declarations go first, as ElementTree writes them
+    attributes = dict(root.attrib)
+    root.attrib.clear()
+    for namespace, prefix in prefixes.items():
+        if namespace in used:
+            root.set(f'xmlns:{prefix}' if prefix else 'xmlns', namespace)
+    root.attrib.update(attributes)
+    return ElementTree.tostring(root, encoding='unicode', xml_declaration=xml_declaration)
+
+
+def optimize_svg(svg_text, precision=3, keep_ids=DEFAULT_KEEP_IDS, strip_ids=True, merge_styles=True):
+    """Return a smaller version of an SVG document.
+
+    Drops comments, the XML prolog, <metadata> and editor (Inkscape/Sodipodi) data, rounds
+    coordinates to `precision` decimals, removes whitespace between elements and, with
+    merge_styles, turns style attributes used more than once into classes in one <style>
+    element. With strip_ids, ids that nothing references are removed, except keep_ids.
+    """
+    # The default parser already discards comments, processing instructions and the DOCTYPE
+    root = ElementTree.fromstring(svg_text.encode('utf-8') if isinstance(svg_text, str) else svg_text)
+    parents = {child: parent for parent in root.iter() for child in parent}
+
+    for element in list(root.iter()):
+        if element.tag == f'{{{SVG_NS}}}metadata' or _namespace(element.tag) in EDITOR_NAMESPACES:
+            parents[element].remove(element)
+            continue
+        for name in list(element.attrib):
+            if _namespace(name) in EDITOR_NAMESPACES:
+                del element.attrib[name]
+            elif name in NUMERIC_ATTRIBUTES:
+                element.attrib[name] = _round_numbers(element.attrib[name], precision)
+        if element.tag not in TEXT_ELEMENTS and element.text is not None and not element.text.strip():
+            element.text = None
+        parent = parents.get(element)
+        if (parent is None or parent.tag not in TEXT_ELEMENTS) and element.tail is not None and not element.tail.strip():
+            element.tail = None
+
+    if strip_ids:
+        referenced = set(keep_ids)
+        for element in root.iter():
+            if element.tag == f'{{{SVG_NS}}}style' and element.text:
+                referenced.update(_selector_ids(element.text))
+            for name, value in element.attrib.items():
+                referenced.update(ID_REFERENCE.findall(value))
+                if name in ('href', f'{{{XLINK_NS}}}href') and value.startswith('#'):
+                    referenced.add(value[1:])
+        for element in root.iter():
+            if element.get('id') is not None and element.get('id') not in referenced:
+                del element.attrib['id']
+
+    if merge_styles:
+        styles = Counter(element.get('style') for element in root.iter() if element.get('style'))
+        classes = {style: f's{number}' for number, (style, count) in enumerate(
+            (style, count) for style, count in styles.most_common() if count > 1)}
+        if classes:
+            for element in root.iter():
+                style = element.get('style')
+                if style in classes:
+                    del element.attrib['style']
+                    element.set('class', f"{element.get('class', '')} {classes[style]}".strip())
+            style_element = ElementTree.Element(f'{{{SVG_NS}}}style')
+            style_element.text = ''.join(f'.{name}{{{style.strip().rstrip(";")}}}' for style, name in classes.items())
+            root.insert(0, style_element)
+
+    return serialize_svg(root)
+
+
+def optimize_svg_file(svg_file, output_file=None, gzip_output=False, **options):
+    """Optimize svg_file into output_file (in place by default) and return a size report.
+
+    With gzip_output an .svgz copy is written next to the output as well.
+    """
+    svg_file = Path(svg_file)
+    output_file = Path(output_file) if output_file else svg_file
+    original = svg_file.read_bytes()
+    optimized = optimize_svg(original, **options).encode('utf-8')
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    output_file.write_bytes(optimized)
+    report = {'file': str(output_file), 'before': len(original), 'after': len(optimized)}
+    if gzip_output:
+        gzip_file = output_file.with_suffix('.svgz')
+        gzip_file.write_bytes(gzip.compress(optimized, compresslevel=9))
+        report['gzip'] = gzip_file.stat().st_size
+    return report
+
+
+def format_report(report):
+    saved = 1 - report['after'] / report['before'] if report['before'] else 0
+    line = f"{report['file']}: {report['before']:,} -> {report['after']:,} bytes ({saved:.1%} smaller)"
+    if 'gzip' in report:
+        line += f", {report['gzip']:,} bytes gzipped"
+    return line
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Shrink SVG files and report the size saved')
+    parser.add_argument('svg_files', nargs='+', help='SVG files to optimize')
+    parser.add_argument('-o', '--output-dir', help='Write optimized files here instead of in place')
+    parser.add_argument('--precision', type=int, default=3, help='Decimal places kept in coordinates')
+    parser.add_argument('--keep-id', action='append', default=list(DEFAULT_KEEP_IDS),
+                        help='Id that must survive even if nothing in the file references it')
+    parser.add_argument('--keep-all-ids', action='store_true', help='Do not remove unreferenced ids')
+    parser.add_argument('--gzip', action='store_true', help='Also write a gzipped .svgz copy')
+
+    args = parser.parse_args()
+
+    total_before = total_after = 0
+    for svg_file in args.svg_files:
+        output_file = Path(args.output_dir) / Path(svg_file).name if args.output_dir else None
+        report = optimize_svg_file(svg_file, output_file, args.gzip, precision=args.precision,
+                                   keep_ids=args.keep_id, strip_ids=not args.keep_all_ids)
+        total_before += report['before']
+        total_after += report['after']
+        print(format_report(report))
+    if len(args.svg_files) > 1:
+        print(format_report({'file': 'total', 'before': total_before, 'after': total_after}))
@@ -0,0 +1,130 @@
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+import yaml
+
+try:
+    from . import profiling
+except ImportError:  # run as a script
+    import profiling
+
+# The LibYAML parser is many times faster than the pure-Python one on large files and builds
+# deeply nested documents without Python recursion
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+# Set to 0 to always parse the YAML and leave no cache files behind
+ENV_VAR = 'COURSE_TOOLS_YAML_CACHE'
+# Set to a directory to keep the cache somewhere other than the user's cache directory
+DIR_ENV_VAR = 'COURSE_TOOLS_YAML_CACHE_DIR'
+# Bump when the layout of cache files changes so old ones are ignored
+FORMAT_VERSION = 2
+
+
+def cache_dir():
+    """The private directory holding the cache: $COURSE_TOOLS_YAML_CACHE_DIR, else
+    $XDG_CACHE_HOME/course-creation-tools/yaml, else ~/.cache/course-creation-tools/yaml."""
+    if os.environ.get(DIR_ENV_VAR):
+        return Path(os.environ[DIR_ENV_VAR])
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'course-creation-tools' / 'yaml'
+
+
+def cache_file(yaml_file):
+    """The compiled copy of yaml_file, named after a hash of its resolved path."""
+    source = str(Path(yaml_file).resolve())
+    return cache_dir() / f"{hashlib.sha256(source.encode('utf-8')).hexdigest()}.pickle"
+
+
+def _private_dir():
+    """Create the cache directory readable by this user only, and return it; None if it is not
+    private. Cache files are unpickled, so one that someone else could write would run their code."""
+    directory = cache_dir()
+    try:
+        directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        stat = os.stat(directory)
+    except OSError:
+        return None
+    if hasattr(os, 'getuid') and (stat.st_uid != os.getuid() or stat.st_mode & 0o022):
+        return None
+    return directory
+
+
+def is_enabled():
+    return os.environ.get(ENV_VAR, '1') != '0'
+
+
+def disable():
+    """Turn the cache off for this process and the worker processes it starts."""
+    os.environ[ENV_VAR] = '0'
+
+
+def _read_header(path):
+    """Return (header, open file positioned at the payload), or (None, None) if there is no usable cache."""
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return None, None
+    try:
+        header = pickle.load(f)
+        if isinstance(header, dict) and header.get('version') == FORMAT_VERSION:
+            return header, f
+    except Exception:
+        pass
+    f.close()
+    return None, None
+
+
+def _write(path, header, data):
+    # Written under a temporary name and moved into place, so concurrent readers never see half a file
+    temporary = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    try:
+        with open(temporary, 'wb') as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+    except (OSError, RecursionError, pickle.PicklingError):
+        # A read-only cache, or an outline nested deeper than pickle can recurse, only costs the speed-up
+        temporary.unlink(missing_ok=True)
+
+
+def load(yaml_file):
+    """Return the parsed content of yaml_file, skipping the YAML parser when the source is unchanged.
+
+    A cache entry is used as is while the file's modification time and size match the ones
+    recorded with it. If only those changed (a touch, a checkout) but the SHA-256 of the content
+    is the same, the entry is still used and its timestamp refreshed. Otherwise the YAML is parsed
+    and the cache rewritten. Entries live in the private cache_dir(), never next to the YAML,
+    so a pickle planted in a shared course tree is never loaded.
+    """
+    if not is_enabled() or _private_dir() is None:
+        with open(yaml_file, 'rb') as f:
+            return yaml.load(f, Loader=YAML_LOADER)
+    with profiling.span('yaml_cache.load') as span:
+        source = str(Path(yaml_file).resolve())
+        path = cache_file(yaml_file)
+        stat = os.stat(yaml_file)
+        header, f = _read_header(path)
+        if f is not None and header.get('source') != source:
+            f.close()
+            header, f = None, None
+        if f is not None:
+            with f:
+                if (header['mtime_ns'], header['size']) == (stat.st_mtime_ns, stat.st_size):
+                    span.count(hits=1)
+                    return pickle.load(f)
+                content = Path(yaml_file).read_bytes()
+                digest = hashlib.sha256(content).hexdigest()
+                if header['sha256'] == digest:
+                    data = pickle.load(f)
+                    span.count(hits=1)
+                    _write(path, dict(header, mtime_ns=stat.st_mtime_ns, size=stat.st_size), data)
+                    return data
+        else:
+            content = Path(yaml_file).read_bytes()
+            digest = hashlib.sha256(content).hexdigest()
+        span.count(misses=1)
+        data = yaml.load(content, Loader=YAML_LOADER)
+        header = {'version': FORMAT_VERSION, 'source': source, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': digest}
+        _write(path, header, data)
+        return data
@@ -0,0 +1,39 @@
+import glob
+from pathlib import Path
+
+YAML_SUFFIXES = ('.yaml', '.yml')
+
+
+def collect_yaml_files(patterns, missing_ok=False, output_suffix=''):
+    """Expand files, directories and glob patterns into (yaml_file, relative_name) pairs.
+
+    Files found under a directory keep their sub-directory in the relative name, so
+    inputs with the same file name in different folders don't overwrite each other's
+    output. A pattern that matches nothing is an error unless missing_ok is set.
+    output_suffix (such as '.svg') is only used in the message for clashing names.
+    """
+    found = {}
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            for yaml_file in sorted(path.rglob('*')):
+                if yaml_file.suffix in YAML_SUFFIXES and yaml_file.is_file():
+                    found.setdefault(yaml_file.resolve(), yaml_file.relative_to(path).with_suffix(''))
+        elif path.is_file():
+            found.setdefault(path.resolve(), Path(path.stem))
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if not matches and not missing_ok:
+                raise FileNotFoundError(f"No YAML files match {pattern}")
+            for match in matches:
+                if Path(match).suffix in YAML_SUFFIXES:
+                    found.setdefault(Path(match).resolve(), Path(Path(match).stem))
+
+    # Two inputs must never be written to the same output files
+    seen = {}
+    for yaml_file, relative_name in found.items():
+        if relative_name in seen:
+            raise ValueError(f"{seen[relative_name]} and {yaml_file} would both be written as "
+                             f"{relative_name}{output_suffix}")
+        seen[relative_name] = yaml_file
+    return list(found.items())
@@ -0,0 +1,42 @@
+import json
+import sys
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'benchmarks'))
+import workloads
+from run_benchmarks import compare, main
+from course_creation_tools.schema_validation import KNOWLEDGE_GRAPH_SCHEMA, MINDMAP_SCHEMA, schema_errors
+
+def test_generated_knowledge_graphs_are_valid_and_repeatable():
+    graph = workloads.knowledge_graph(100, edges_per_entity=4)
+
+    assert len(graph['entities']) == 100
+    assert len(graph['relationships']) == 400
+    assert schema_errors(graph, KNOWLEDGE_GRAPH_SCHEMA) == []
+    assert workloads.knowledge_graph(100, edges_per_entity=4) == graph
+
+def test_mind_map_yaml_round_trips_deep_and_wide_maps():
+    for data in (workloads.deep_mind_map(150), workloads.wide_mind_map(200)):
+        assert schema_errors(data, MINDMAP_SCHEMA) == []
+        assert yaml.safe_load(workloads.mind_map_yaml(data)) == data
+
+def test_compare_reports_only_slowdowns_over_the_threshold():
+    baseline = {'a': {'median': 1.0}, 'b': {'median': 1.0}, 'c': {'skipped': 'no dot'}}
+    results = {'a': {'median': 1.1}, 'b': {'median': 1.5}, 'c': {'median': 9.0}, 'd': {'median': 9.0}}
+
+    assert compare(results, baseline, threshold=0.2) == [('b', 1.0, 1.5)]
+
+def test_main_writes_results_and_fails_on_regression(tmp_path):
+    output = tmp_path / 'results.json'
+    baseline = tmp_path / 'baseline.json'
+    argv = ['-k', 'convert_yaml_file[deep', '--sizes', '', '--repeat', '1', '-o', str(output)]
+
+    assert main(argv) == 0
+    results = json.loads(output.read_text())['results']
+    assert list(results) == ['convert_yaml_file[deep-100]']
+
+    results['convert_yaml_file[deep-100]']['median'] = 1e-9
+    baseline.write_text(json.dumps({'results': results}))
+    assert main(argv + ['--baseline', str(baseline)]) == 1
@@ -0,0 +1,163 @@
+import io
+import os
+import tempfile
+import tracemalloc
+import yaml
+from pathlib import Path
+from course_creation_tools import convert_yaml_to_freeplane
+from course_creation_tools.convert_freeplane_to_yaml import (
+    converter, convert_freeplane_file, main, node_key, write_yaml)
+from course_creation_tools.schema_validation import MINDMAP_SCHEMA, schema_errors
+from test_convert_yaml_to_freeplane import SAMPLE_YAML
+
+ROUND_TRIP_YAML = r"""root:
+  title: "Course <Plan> & \"Goals\""
+  note: "Root note with 'quotes' & <tags>\nand a second line"
+  children:
+    introduction:
+      title: Introduction
+      note: Welcome — café
+      children:
+        part_a:
+          title: "Part A"
+        part_a_2:
+          title: "Part A"
+          note: ""
+    "yes":
+      title: "yes"
+      children:
+        tab_here_spaced:
+          title: "Tab\there  spaced  "
+          note: "  leading and trailing  \n\n  indented line"
+        "2024":
+          title: "2024"
+          note: "key: value # not a comment"
+"""
+
+FREEPLANE_MM = """<map version="freeplane 1.9.13">
+<!--To view this file, download free mind mapping software Freeplane from https://www.freeplane.org -->
+<node ID="ID_1" CREATED="1" MODIFIED="2"><richcontent TYPE="NODE">
+<html>
+  <head>
+
+  </head>
+  <body>
+    <p>
+      My   plan
+    </p>
+  </body>
+</html>
+</richcontent>
+<hook NAME="MapStyle"><map_styles><stylenode LOCALIZED_TEXT="default"/></map_styles></hook>
+<node TEXT="First" POSITION="right" ID="ID_2">
+<icon BUILTIN="idea"/>
+<node TEXT="Child" ID="ID_3"/>
+<richcontent TYPE="NOTE" CONTENT-TYPE="xml/">
+<html>
+  <head>
+
+  </head>
+  <body>
+    <p>
+      First paragraph,
+      wrapped.
+    </p>
+    <p>
+      Second <b>bold</b> paragraph
+    </p>
+  </body>
+</html>
+</richcontent>
+</node>
+<node TEXT="First" POSITION="left" ID="ID_4"/>
+</node>
+</map>
+"""
+
+def titles_and_notes(node):
+    """The node tree without its keys: (title, note, [children])."""
+    children = (node.get('children') or {}).values()
+    return node['title'], node.get('note'), [titles_and_notes(child) for child in children]
+
+def test_round_trip_is_exact_when_keys_are_title_slugs():
+    # Freeplane does not store the YAML keys; ROUND_TRIP_YAML uses the keys node_key derives
+    mm = convert_yaml_to_freeplane.converter(ROUND_TRIP_YAML)
+    assert yaml.safe_load(converter(mm)) == yaml.safe_load(ROUND_TRIP_YAML)
+
+def test_round_trip_rebuilds_other_keys_from_titles():
+    round_tripped = yaml.safe_load(converter(convert_yaml_to_freeplane.converter(SAMPLE_YAML)))
+
+    assert 'intro' in yaml.safe_load(SAMPLE_YAML)['root']['children']
+    assert list(round_tripped['root']['children'])[0] == 'introduction'
+
+def test_round_trip_keeps_titles_notes_and_order():
+    original = yaml.safe_load(SAMPLE_YAML)
+    round_tripped = yaml.safe_load(converter(convert_yaml_to_freeplane.converter(SAMPLE_YAML)))
+
+    assert titles_and_notes(round_tripped['root']) == titles_and_notes(original['root'])
+    assert schema_errors(round_tripped, MINDMAP_SCHEMA) == []
+
+def test_reads_freeplane_html_content():
+    data = yaml.safe_load(converter(FREEPLANE_MM))
+
+    assert data == {'root': {'title': 'My plan', 'children': {
+        'first': {
+            'title': 'First',
+            'note': 'First paragraph, wrapped.\nSecond bold paragraph',
+            'children': {'child': {'title': 'Child'}},
+        },
+        'first_2': {'title': 'First'},
+    }}}
+
+def test_notes_starting_with_a_line_break_keep_their_whitespace():
+    outline = {'root': {'title': 'Plan', 'note': '\nStarts on a new line,  with   spaces'}}
+    mm = convert_yaml_to_freeplane.converter(yaml.safe_dump(outline))
+
+    assert yaml.safe_load(converter(mm)) == outline
+
+def test_node_key_fits_schema_and_is_unique():
+    used = {}
+    assert node_key('Hello, World!', used) == 'hello_world'
+    assert node_key('hello world', used) == 'hello_world_2'
+    assert node_key('???', used) == 'node'
+
+def test_convert_freeplane_file_matches_converter():
+    plan = Path(__file__).parent / 'plan' / 'course-creation-tools-plan.mm'
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_file = os.path.join(temp_dir, 'plan.yaml')
+        convert_freeplane_file(str(plan), output_file)
+        with open(output_file, encoding='utf-8') as f:
+            content = f.read()
+
+    assert content == converter(plan.read_bytes())
+    data = yaml.safe_load(content)
+    assert data['root']['title'] == 'plan'
+    assert schema_errors(data, MINDMAP_SCHEMA) == []
+
+def test_main_writes_yaml_named_after_the_map(tmp_path, capsys):
+    mm_file = tmp_path / 'plan.mm'
+    mm_file.write_text(FREEPLANE_MM, encoding='utf-8')
+
+    output_file = main([str(mm_file), str(tmp_path / 'out')])
+
+    assert output_file == str(tmp_path / 'out' / 'plan.yaml')
+    assert yaml.safe_load(Path(output_file).read_text(encoding='utf-8')) == yaml.safe_load(converter(FREEPLANE_MM))
+    assert f"to {output_file}" in capsys.readouterr().out
+
+def test_memory_does_not_grow_with_map_size():
+    class NullWriter:
+        def write(self, text):
+            pass
+
+    def peak_memory(nodes):
+        mm = ('<map version="1.9.13"><node TEXT="Root">'
+              + '<node TEXT="Topic"><node TEXT="Detail"/></node>' * nodes
+              + '</node></map>').encode('utf-8')
+        tracemalloc.start()
+        write_yaml(io.BytesIO(mm), NullWriter())
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak
+
+    # Sibling keys of one parent are remembered, so allow a little growth per node
+    assert peak_memory(20000) < peak_memory(2000) + 20000 * 200
@@ -0,0 +1,261 @@
+import re
+import sys
+import tempfile
+from pathlib import Path
+import os
+from course_creation_tools.convert_yaml_to_freeplane import (
+    converter, convert_batch, convert_yaml_file, format_throughput, main, stable_node_id, validate_yaml_file,
+    walk_nodes)
+import pytest
+
+SAMPLE_YAML = r"""root:
+  title: "Course <Plan> & \"Goals\""
+  note: "Root note with 'quotes' & <tags>\nand a second line"
+  children:
+    intro:
+      title: Introduction
+      note: Welcome — café
+      children:
+        part_a:
+          title: "Part A"
+        part_b:
+          title: "Part B"
+          note: ""
+    basics:
+      title: Basics
+      children:
+        deep:
+          title: "Tab\there  spaced  "
+          children:
+            deeper:
+              title: Deeper
+              note: "  leading and trailing  "
+    third:
+      title: Third
+"""
+
+# Output of the original ElementTree + minidom.toprettyxml implementation (Python 3.13+ escaping
+# of tabs in attributes), with IDs blanked
+EXPECTED_MM = """<?xml version="1.0" ?>
+<map version="1.9.13">
+    <node TEXT="Course &lt;Plan&gt; &amp; &quot;Goals&quot;" ID="ID">
+        <richcontent TYPE="NOTE" CONTENT-TYPE="xml/">
+            <html>
+                <head/>
+                <body>
+                    <p>Root note with 'quotes' &amp; &lt;tags&gt;
+and a second line</p>
+                </body>
+            </html>
+        </richcontent>
+        <node TEXT="Introduction" ID="ID" POSITION="right">
+            <richcontent TYPE="NOTE" CONTENT-TYPE="xml/">
+                <html>
+                    <head/>
+                    <body>
+                        <p>Welcome — café</p>
+                    </body>
+                </html>
+            </richcontent>
+            <node TEXT="Part A" ID="ID"/>
+            <node TEXT="Part B" ID="ID">
+                <richcontent TYPE="NOTE" CONTENT-TYPE="xml/">
+                    <html>
+                        <head/>
+                        <body>
+                            <p/>
+                        </body>
+                    </html>
+                </richcontent>
+            </node>
+        </node>
+        <node TEXT="Basics" ID="ID" POSITION="left">
+            <node TEXT="Tab&#9;here  spaced  " ID="ID">
+                <node TEXT="Deeper" ID="ID">
+                    <richcontent TYPE="NOTE" CONTENT-TYPE="xml/">
+                        <html>
+                            <head/>
+                            <body>
+                                <p>  leading and trailing  </p>
+                            </body>
+                        </html>
+                    </richcontent>
+                </node>
+            </node>
+        </node>
+        <node TEXT="Third" ID="ID" POSITION="right"/>
+    </node>
+</map>
+"""
+
+def blank_ids(mind_map):
+    return re.sub(r'ID="ID_[0-9a-f_]+"', 'ID="ID"', mind_map)
+
+def test_converter_output_matches_pretty_printed_format():
+    assert blank_ids(converter(SAMPLE_YAML)) == EXPECTED_MM
+
+def test_convert_yaml_file_streams_same_output():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yaml_file = Path(temp_dir) / "plan.yaml"
+        yaml_file.write_text(SAMPLE_YAML, encoding="utf-8")
+        mm_file = Path(temp_dir) / "plan.mm"
+
+        convert_yaml_file(yaml_file, mm_file)
+
+        assert blank_ids(mm_file.read_text(encoding="utf-8")) == EXPECTED_MM
+
+def test_whitespace_in_titles_is_escaped_and_notes_keep_line_breaks():
+    outline = 'root:\n  title: "tab\\there\\nnew line\\r\\nend"\n  note: "first\\r\\nsecond\\rthird"\n'
+
+    mind_map = converter(outline)
+
+    assert 'TEXT="tab&#9;here&#10;new line&#13;&#10;end"' in mind_map
+    assert "<p>first\nsecond\nthird</p>" in mind_map
+
+def test_validate_yaml_file_reports_schema_errors():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yaml_file = Path(temp_dir) / "bad.yaml"
+        yaml_file.write_text("root:\n  title: Plan\n  children:\n    first:\n      note: no title\n")
+
+        assert validate_yaml_file(yaml_file) == ["root/children/first: 'title' is a required property"]
+
+def deep_outline(depth):
+    lines = ["root:"]
+    for level in range(depth):
+        indent = "    " * level
+        lines += [f"{indent}  title: Level {level}", f"{indent}  children:", f"{indent}    child:"]
+    lines.append("    " * depth + "  title: Leaf")
+    return "\n".join(lines)
+
+def test_converter_handles_maps_deeper_than_the_recursion_limit():
+    depth = sys.getrecursionlimit() + 500
+
+    mind_map = converter(deep_outline(depth))
+
+    assert mind_map.count("<node ") == depth + 1
+    assert 'TEXT="Leaf"' in mind_map
+
+def test_convert_yaml_file_handles_deep_maps_with_the_yaml_cache_on(tmp_path, monkeypatch):
+    monkeypatch.setenv("COURSE_TOOLS_YAML_CACHE", "1")
+    depth = 3000
+    yaml_file = tmp_path / "deep.yaml"
+    yaml_file.write_text(deep_outline(depth), encoding="utf-8")
+
+    for _ in range(2):
+        convert_yaml_file(yaml_file, tmp_path / "deep.mm")
+        mind_map = (tmp_path / "deep.mm").read_text(encoding="utf-8")
+        assert mind_map.count("<node ") == depth + 1
+
+def test_walk_nodes_alternates_top_level_positions():
+    root = {"title": "Root", "children": {
+        "a": {"title": "A", "children": {"a1": {"title": "A1"}}},
+        "b": {"title": "B"},
+        "c": {"title": "C"},
+    }}
+
+    events = [(event, node["title"], position, depth, key_path)
+              for event, node, position, depth, key_path in walk_nodes(root)]
+
+    assert events == [
+        ("start", "Root", None, 1, ()),
+        ("start", "A", "right", 2, ("a",)),
+        ("start", "A1", None, 3, ("a", "a1")),
+        ("end", "A1", None, 3, ("a", "a1")),
+        ("end", "A", None, 2, ("a",)),
+        ("start", "B", "left", 2, ("b",)),
+        ("end", "B", None, 2, ("b",)),
+        ("start", "C", "right", 2, ("c",)),
+        ("end", "C", None, 2, ("c",)),
+        ("end", "Root", None, 1, ()),
+    ]
+
+def test_stable_ids_are_repeatable_and_unique():
+    first = converter(SAMPLE_YAML, stable_ids=True)
+    second = converter(SAMPLE_YAML, stable_ids=True)
+
+    assert first == second
+    assert blank_ids(first) == EXPECTED_MM
+    ids = re.findall(r'ID="(ID_[0-9a-f]+)"', first)
+    assert len(ids) == len(set(ids)) == 8
+
+def test_stable_ids_accept_numeric_keys_and_do_not_collide():
+    numeric = "root:\n  title: Years\n  children:\n    2024:\n      title: This year\n    2025:\n      title: Next\n"
+    mind_map = converter(numeric, stable_ids=True)
+    assert re.sub(r'ID="ID_[0-9a-f]+"', 'ID="ID"', mind_map) == blank_ids(converter(numeric))
+
+    assert stable_node_id(("a/b",)) != stable_node_id(("a", "b"))
+    assert stable_node_id((2024,)) != stable_node_id(("2024",))
+    assert stable_node_id((True,)) != stable_node_id(("True",))
+
+def test_stable_ids_stay_unique_for_keys_that_only_differ_in_type():
+    mixed = 'root:\n  title: Mixed\n  children:\n    2024:\n      title: Number\n    "2024":\n      title: Text\n'
+    ids = re.findall(r'ID="(ID_[0-9a-f]+)"', converter(mixed, stable_ids=True))
+    assert len(ids) == len(set(ids)) == 3
+
+def test_convert_batch_mirrors_directories_and_skips_unchanged_inputs():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = Path(temp_dir) / "outlines"
+        (source / "unit1").mkdir(parents=True)
+        (source / "unit1" / "plan.yaml").write_text(SAMPLE_YAML, encoding="utf-8")
+        (source / "plan.yaml").write_text(SAMPLE_YAML, encoding="utf-8")
+        output_dir = Path(temp_dir) / "mm"
+
+        first = convert_batch([str(source)], str(output_dir), workers=2)
+        assert sorted(path.relative_to(output_dir).as_posix() for path in first['converted']) == \
+            ["plan.mm", "unit1/plan.mm"]
+        assert first['nodes'] == 16
+        assert blank_ids((output_dir / "unit1" / "plan.mm").read_text(encoding="utf-8")) == EXPECTED_MM
+
+        second = convert_batch([str(source)], str(output_dir), workers=2)
+        assert second['converted'] == [] and len(second['skipped']) == 2
+
+        # With the mind map still newer than its input, the manifest's content hash decides:
+        # a re-touched input with the same content is skipped, an edited one is converted again
+        edited = source / "plan.yaml"
+        output_mtime = os.stat(output_dir / "plan.mm").st_mtime_ns
+        os.utime(edited, ns=(output_mtime - 1_000_000, output_mtime - 1_000_000))
+        touched = convert_batch([str(source)], str(output_dir))
+        assert touched['converted'] == [] and len(touched['skipped']) == 2
+
+        edited.write_text(SAMPLE_YAML.replace("Third", "Fourth"), encoding="utf-8")
+        os.utime(edited, ns=(output_mtime - 2_000_000, output_mtime - 2_000_000))
+        third = convert_batch([str(source)], str(output_dir))
+        assert third['converted'] == [output_dir / "plan.mm"]
+        assert "Fourth" in (output_dir / "plan.mm").read_text(encoding="utf-8")
+        assert "files/s" in format_throughput(third)
+
+        # An output older than its input is converted again without looking at the hash
+        os.utime(output_dir / "plan.mm", ns=(0, 0))
+        assert convert_batch([str(source)], str(output_dir))['converted'] == [output_dir / "plan.mm"]
+
+        assert convert_batch([str(source)], str(output_dir), force=True)['skipped'] == []
+
+def test_main_keeps_input_then_output_directory_form(capsys):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yaml_file = Path(temp_dir) / "outline.yaml"
+        yaml_file.write_text(SAMPLE_YAML, encoding="utf-8")
+        output_dir = Path(temp_dir) / "out"
+
+        with pytest.raises(SystemExit) as exit_info:
+            main([str(yaml_file), str(output_dir)])
+
+        assert exit_info.value.code == 0
+        assert (output_dir / "outline.mm").exists()
+        assert "Converted 1 files (8 nodes)" in capsys.readouterr().out
+
+def test_validate_only_ignores_the_output_directory(tmp_path, capsys):
+    yaml_file = tmp_path / "outline.yaml"
+    yaml_file.write_text(SAMPLE_YAML, encoding="utf-8")
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    (output_dir / "stray.yaml").write_text("root:\n  note: no title\n", encoding="utf-8")
+
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(yaml_file), str(output_dir), "--validate-only"])
+
+    assert exit_info.value.code == 0
+    assert "stray.yaml" not in capsys.readouterr().out
+
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(yaml_file), str(tmp_path / "missing"), "--validate-only"])
+    assert exit_info.value.code == 0
@@ -0,0 +1,63 @@
+import pytest
+from course_creation_tools.graph_index import GraphIndex
+
+def graph(edges, extra=()):
+    ids = sorted({end for edge in edges for end in edge} | set(extra))
+    return GraphIndex({
+        'entities': [{'id': entity_id, 'name': entity_id.upper(), 'description': ''} for entity_id in ids],
+        'relationships': [{'source': source, 'target': target, 'name': f'{source}->{target}'}
+                          for source, target in edges],
+    })
+
+def test_neighbours_follow_the_direction():
+    index = graph([('a', 'b'), ('c', 'a'), ('a', 'b')])
+
+    assert list(index.neighbours('a', 'out')) == ['b', 'b']
+    assert list(index.neighbours('a', 'in')) == ['c']
+    assert sorted(index.neighbours('a')) == ['b', 'b', 'c']
+    with pytest.raises(ValueError):
+        list(index.neighbours('a', 'sideways'))
+
+def test_ego_graph_keeps_entities_within_the_hops_and_their_relationships():
+    index = graph([('a', 'b'), ('b', 'c'), ('c', 'd'), ('x', 'a'), ('b', 'a')])
+
+    assert index.ego_ids(['a'], hops=2) == {'a': 0, 'b': 1, 'x': 1, 'c': 2}
+    focused = index.ego_graph('a', hops=1)
+    assert [entity['id'] for entity in focused['entities']] == ['a', 'b', 'x']
+    assert [rel['name'] for rel in focused['relationships']] == ['a->b', 'x->a', 'b->a']
+    assert index.ego_ids(['a'], hops=1, direction='out') == {'a': 0, 'b': 1}
+
+def test_subgraph_does_not_scan_every_entity():
+    class NoScanList(list):
+        def __iter__(self):
+            raise AssertionError('the whole entity list was scanned')
+
+    index = graph([(f'e{i}', f'e{i + 1}') for i in range(100)])
+    index.data['entities'] = NoScanList(index.data['entities'])
+
+    focused = index.ego_graph('e50', hops=1)
+    assert [entity['id'] for entity in focused['entities']] == ['e49', 'e50', 'e51']
+
+def test_ego_graph_of_unknown_entity_is_an_error():
+    with pytest.raises(KeyError):
+        graph([('a', 'b')]).ego_ids(['z'])
+
+def test_shortest_path():
+    index = graph([('a', 'b'), ('b', 'c'), ('a', 'd'), ('d', 'e'), ('e', 'c')], extra=['lonely'])
+
+    assert index.shortest_path('a', 'c') == ['a', 'b', 'c']
+    assert index.shortest_path('c', 'a') is None
+    assert index.shortest_path('c', 'a', direction='both') == ['c', 'b', 'a']
+    assert index.shortest_path('a', 'lonely', direction='both') is None
+
+def test_connected_components_ignore_direction():
+    index = graph([('a', 'b'), ('c', 'b'), ('x', 'y')], extra=['solo'])
+
+    assert [sorted(component) for component in index.connected_components()] == [
+        ['a', 'b', 'c'], ['x', 'y'], ['solo']]
+
+def test_deep_chains_do_not_recurse():
+    index = graph([(f'n{i}', f'n{i + 1}') for i in range(20_000)])
+
+    assert len(index.shortest_path('n0', 'n20000')) == 20_001
+    assert len(index.connected_components()) == 1
@@ -0,0 +1,43 @@
+from course_creation_tools.graph_viewer import viewer_payload, viewer_html
+
+LAYOUT = {
+    "name": "%3",
+    "bb": "0,0,300,100",
+    "objects": [
+        {"_gvid": 0, "name": "a", "label": "A", "tooltip": "First", "pos": "27,50", "width": "0.75", "height": "0.5"},
+        {"_gvid": 1, "name": "b", "label": "B", "tooltip": "Second </script>", "pos": "273,50",
+         "width": "0.75", "height": "0.5"},
+    ],
+    "edges": [
+        {"_gvid": 0, "tail": 0, "head": 1, "label": "leads to", "lp": "150,60",
+         "pos": "e,245,50 54,50 100,50 150,50 235,50"},
+    ],
+}
+
+def test_viewer_payload_flips_coordinates_and_splits_descriptions():
+    payload, descriptions = viewer_payload(LAYOUT)
+
+    assert payload["width"] == 300 and payload["height"] == 100
+    assert payload["nodes"][0] == [27, 50, 54, 36, "A"]
+    assert payload["edges"] == [[0, 1, [54, 50, 100, 50, 150, 50, 235, 50], [245, 50], "leads to", 150, 40]]
+    assert descriptions == ["First", "Second </script>"]
+
+def test_viewer_html_embeds_payload_safely():
+    payload, descriptions = viewer_payload(LAYOUT)
+
+    html = viewer_html(payload, descriptions)
+
+    assert '<canvas id="graph">' in html
+    assert '"leads to"' in html
+    assert "Second \\u003c/script>" in html
+    assert "</script>\"" not in html
+
+def test_viewer_html_leaves_placeholders_in_the_graph_data_alone():
+    payload, descriptions = viewer_payload(LAYOUT)
+    descriptions[0] = "__DESCRIPTIONS__ <!-- __PAYLOAD__"
+
+    html = viewer_html(payload, descriptions)
+
+    assert html.count('id="graph-descriptions">') == 1
+    assert '"__DESCRIPTIONS__ \\u003c!-- __PAYLOAD__"' in html
+    assert "<!--" not in html
@@ -0,0 +1,56 @@
+import os
+import pytest
+import tempfile
+import yaml
+from pathlib import Path
+from course_creation_tools.graph_watcher import GraphWatcher
+
+GRAPH = {
+    "entities": [{"id": "a", "name": "A", "description": "First"}],
+    "relationships": [],
+}
+
+@pytest.fixture
+def yaml_file():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(tmpdirname) / "graph.yaml"
+        path.write_text(yaml.dump(GRAPH))
+        yield path
+
+def rewrite(path, text, mtime):
+    path.write_text(text)
+    os.utime(path, (mtime, mtime))
+
+def make_watcher(yaml_file, rendered, clock):
+    return GraphWatcher(lambda: [(yaml_file, Path("graph"))],
+                        lambda path, name: rendered.append(path),
+                        debounce=1.0, clock=lambda: clock[0])
+
+def test_renders_after_debounce(yaml_file):
+    rendered, clock = [], [0.0]
+    watcher = make_watcher(yaml_file, rendered, clock)
+
+    assert watcher.poll() == []
+    clock[0] = 1.5
+    assert watcher.poll() == [yaml_file]
+
+def test_skips_changes_that_do_not_touch_the_graph(yaml_file):
+    rendered, clock = [], [0.0]
+    watcher = make_watcher(yaml_file, rendered, clock)
+    watcher.poll()
+    clock[0] = 1.5
+    watcher.poll()
+
+    rewrite(yaml_file, "# just a comment\n" + yaml.dump(GRAPH), 1000)
+    clock[0] = 2.0
+    watcher.poll()
+    clock[0] = 3.5
+    assert watcher.poll() == []
+
+    changed = dict(GRAPH, relationships=[{"source": "a", "target": "a", "name": "loops"}])
+    rewrite(yaml_file, yaml.dump(changed), 2000)
+    clock[0] = 4.0
+    watcher.poll()
+    clock[0] = 5.5
+    assert watcher.poll() == [yaml_file]
+    assert rendered == [yaml_file, yaml_file]
@@ -2,9 +2,17 @@ import pytest
 from pathlib import Path
 import yaml
 import json
-from knowledge_graph_visualizer import create_knowledge_graph, create_inline_html
+import knowledge_graph_visualizer
+from knowledge_graph_visualizer import (create_knowledge_graph, create_inline_html, collect_yaml_files,
+                                        render_batch, render_focus, render_graph, load_graph, build_digraph,
+                                        layout_formats, GraphValidationError, validate_graph_file)
+from course_creation_tools.render_cache import RenderCache
 import tempfile
 import os
+import pickle
+import re
+import shutil
+from xml.etree import ElementTree
 
 @pytest.fixture
 def temp_dir():
@@ -119,6 +127,251 @@ def test_invalid_relationship():
         with open(yaml_path, "w") as f:
             yaml.dump(invalid_yaml, f)
         
-        # Test should create the graph but we should verify the error is handled gracefully
-        svg_file = create_knowledge_graph(yaml_path, output_dir=temp_dir)
+        # The dangling target is reported before anything is rendered
+        with pytest.raises(GraphValidationError) as excinfo:
+            create_knowledge_graph(yaml_path, output_dir=temp_dir)
+        assert excinfo.value.errors == ["relationship 0 has unknown target 'nonexistent'"]
+        assert not list(Path(temp_dir).glob("*.svg"))
+
+def test_load_graph_reports_every_error(temp_dir):
+    yaml_path = Path(temp_dir) / "many_errors.yaml"
+    yaml_path.write_text(yaml.dump({
+        "entities": [
+            {"id": "a", "name": "A", "description": "A"},
+            {"id": "a", "name": "A again", "description": "A"},
+        ],
+        "relationships": [
+            {"source": "a", "target": "b", "name": "r1"},
+            {"source": "c", "target": "a", "name": "r2"},
+        ],
+    }))
+
+    with pytest.raises(GraphValidationError) as excinfo:
+        load_graph(yaml_path)
+
+    assert excinfo.value.errors == [
+        "entity 1 duplicates id 'a'",
+        "relationship 0 has unknown target 'b'",
+        "relationship 1 has unknown source 'c'",
+    ]
+
+def test_collect_yaml_files_names_outputs_per_input(sample_yaml_file, temp_dir):
+    nested = Path(temp_dir) / "lessons" / "week1.yml"
+    nested.parent.mkdir()
+    nested.write_text(Path(sample_yaml_file).read_text())
+    (Path(temp_dir) / "notes.txt").write_text("not a graph")
+
+    jobs = collect_yaml_files([temp_dir])
+
+    names = sorted(str(relative_name) for _, relative_name in jobs)
+    assert names == [str(Path("lessons") / "week1"), "test_graph"]
+
+def test_collect_yaml_files_rejects_clashing_names(sample_yaml_file, temp_dir):
+    other_dir = Path(temp_dir) / "other"
+    other_dir.mkdir()
+    clash = other_dir / "test_graph.yaml"
+    clash.write_text(Path(sample_yaml_file).read_text())
+
+    with pytest.raises(ValueError, match=r"test_graph\.svg"):
+        collect_yaml_files([str(sample_yaml_file), str(clash)], output_suffix=".svg")
+
+def test_both_tools_collect_inputs_the_same_way():
+    from course_creation_tools import convert_yaml_to_freeplane
+    assert knowledge_graph_visualizer.collect_yaml_files is convert_yaml_to_freeplane.collect_yaml_files
+
+def test_render_batch(sample_yaml_file, temp_dir):
+    second = Path(temp_dir) / "second_graph.yaml"
+    second.write_text(Path(sample_yaml_file).read_text())
+    output_dir = Path(temp_dir) / "out"
+
+    summary = render_batch([str(Path(temp_dir) / "*.yaml")], output_dir=output_dir, workers=2)
+
+    assert summary['failed'] == []
+    assert len(summary['rendered']) == 2
+    for _, svg_file, html_file in summary['rendered']:
         assert svg_file.exists()
+        assert html_file.exists()
+    assert (output_dir / "second_graph.svg").exists()
+    assert (output_dir / "test_graph_inline.html").exists()
+
+def test_graph_validation_error_survives_pickling():
+    error = pickle.loads(pickle.dumps(GraphValidationError("g.yaml", ["relationship 0 has unknown target 'x'"])))
+
+    assert error.yaml_file == "g.yaml"
+    assert error.errors == ["relationship 0 has unknown target 'x'"]
+    assert str(error) == "g.yaml: relationship 0 has unknown target 'x'"
+
+def test_render_batch_reports_invalid_graphs_and_renders_the_rest(temp_dir, capsys):
+    for name, target in (("good", "a"), ("broken", "missing")):
+        (Path(temp_dir) / f"{name}.yaml").write_text(yaml.dump({
+            "entities": [{"id": "a", "name": "A", "description": ""}],
+            "relationships": [{"source": "a", "target": target, "name": "self"}],
+        }))
+
+    summary = render_batch([str(Path(temp_dir) / "*.yaml")], output_dir=Path(temp_dir) / "out", workers=2)
+
+    assert [rendered[0].stem for rendered in summary['rendered']] == ["good"]
+    [(yaml_file, error)] = summary['failed']
+    assert yaml_file.stem == "broken" and isinstance(error, GraphValidationError)
+    assert error.errors == ["relationship 0 has unknown target 'missing'"]
+
+    with pytest.raises(SystemExit) as exited:
+        knowledge_graph_visualizer.main([str(Path(temp_dir) / "*.yaml"), "-o", str(Path(temp_dir) / "out"),
+                                         "-j", "2"])
+    assert exited.value.code == 1
+    assert "Invalid knowledge graph" in capsys.readouterr().out
+
+def test_render_focus_draws_only_the_neighbourhood(temp_dir):
+    chain = Path(temp_dir) / "chain.yaml"
+    chain.write_text(yaml.dump({
+        "entities": [{"id": f"e{i}", "name": f"Entity {i}", "description": ""} for i in range(5)],
+        "relationships": [{"source": f"e{i}", "target": f"e{i + 1}", "name": "next"} for i in range(4)],
+    }))
+
+    results = render_focus(chain, ["e0", "e4", "e0"], hops=1, output_dir=temp_dir, workers=2)
+
+    assert [entity_id for entity_id, _, _ in results] == ["e0", "e4"]
+    first = results[0][1].read_text()
+    assert results[0][1].name == "knowledge_graph_e0.svg"
+    assert "Entity 1" in first and "Entity 2" not in first
+    assert results[1][2].exists()
+
+def test_render_focus_rejects_unknown_entities(sample_yaml_file, temp_dir):
+    with pytest.raises(GraphValidationError) as raised:
+        render_focus(sample_yaml_file, ["test1", "missing"], output_dir=temp_dir)
+    assert raised.value.errors == ["focus entity 'missing' is not in the graph"]
+
+def test_render_focus_rejects_ids_that_share_an_output_name(temp_dir):
+    graph_file = Path(temp_dir) / "names.yaml"
+    graph_file.write_text(yaml.dump({
+        "entities": [{"id": entity_id, "name": entity_id, "description": ""} for entity_id in ("a b", "a_b")],
+        "relationships": [],
+    }))
+
+    with pytest.raises(GraphValidationError) as raised:
+        render_focus(graph_file, ["a b", "a_b"], output_dir=temp_dir)
+    assert raised.value.errors == ["focus entities 'a b', 'a_b' would all be written as knowledge_graph_a_b.svg"]
+
+def test_render_graph_writes_extra_formats_from_one_layout(sample_yaml_file, temp_dir):
+    svg_file, html_file = render_graph(sample_yaml_file, temp_dir, formats=["png", "pdf"])
+
+    assert svg_file.name == "knowledge_graph.svg"
+    assert (Path(temp_dir) / "knowledge_graph.png").read_bytes().startswith(b"\x89PNG")
+    assert (Path(temp_dir) / "knowledge_graph.pdf").read_bytes().startswith(b"%PDF")
+    assert "Test Entity 1" in html_file.read_text()
+
+def test_layout_formats_lays_out_once(monkeypatch, temp_dir):
+    commands = []
+    def run(command, source):
+        commands.append((command, source))
+        return b"positioned"
+    monkeypatch.setattr(knowledge_graph_visualizer, "_run_graphviz", run)
+    dot = build_digraph({"entities": [{"id": "a", "name": "A", "description": ""}], "relationships": []})
+    output_path = Path(temp_dir) / "graph"
+
+    files = layout_formats(dot, output_path, ["svg", "png", "pdf"])
+
+    assert files["png"] == Path(temp_dir) / "graph.png"
+    assert [command for command, _ in commands] == [
+        ["dot", "-Tsvg", "-o", str(files["svg"]), "-Tpng", "-o", str(files["png"]), "-Tpdf", "-o", str(files["pdf"])]]
+
+    commands.clear()
+    layout_formats(dot, output_path, ["svg", "png"], concurrent=True)
+
+    assert commands[0] == (["dot", "-Tdot"], dot.source.encode("utf-8"))
+    assert sorted(command for command, _ in commands[1:]) == [
+        ["neato", "-n2", "-Tpng", "-o", str(files["png"])], ["neato", "-n2", "-Tsvg", "-o", str(files["svg"])]]
+    assert {source for _, source in commands[1:]} == {b"positioned"}
+
+def svg_drawing(svg_file):
+    """Title, labels and coordinates of every node and edge group in a Graphviz SVG."""
+    svg = "{http://www.w3.org/2000/svg}"
+    drawing = {}
+    for group in ElementTree.parse(svg_file).getroot().iter(f"{svg}g"):
+        if group.get("class") in ("node", "edge"):
+            labels = [text.text for text in group.iter(f"{svg}text")]
+            numbers = [float(number) for shape in group.iter() for name in ("points", "d", "cx", "cy", "x", "y")
+                       for number in re.findall(r"-?\d+(?:\.\d+)?", shape.get(name, ""))]
+            drawing[group.findtext(f"{svg}title")] = (labels, numbers)
+    return drawing
+
+@pytest.mark.skipif(shutil.which("dot") is None or shutil.which("neato") is None, reason="needs Graphviz")
+def test_concurrent_formats_draw_the_same_graph_as_dot(sample_yaml_file, temp_dir):
+    data, _ = load_graph(sample_yaml_file)
+    dot = build_digraph(data)
+    sequential = layout_formats(dot, Path(temp_dir) / "sequential", ["svg", "png"])
+    concurrent = layout_formats(dot, Path(temp_dir) / "concurrent", ["svg", "png"], concurrent=True)
+
+    expected, drawn = svg_drawing(sequential["svg"]), svg_drawing(concurrent["svg"])
+    assert drawn.keys() == expected.keys()
+    for title, (labels, numbers) in expected.items():
+        assert drawn[title][0] == labels
+        assert drawn[title][1] == pytest.approx(numbers, abs=1)
+    assert concurrent["png"].read_bytes().startswith(b"\x89PNG")
+
+def test_concurrent_formats_are_cached_apart(sample_yaml_file, temp_dir, monkeypatch):
+    drawn = []
+    def layout(dot, output_path, formats, backend, concurrent):
+        drawn.append(concurrent)
+        for fmt in formats:
+            Path(output_path).with_name(f"{Path(output_path).name}.{fmt}").write_text(fmt)
+    monkeypatch.setattr(knowledge_graph_visualizer, "layout_formats", layout)
+    cache = RenderCache(Path(temp_dir) / "cache")
+
+    for concurrent in (False, True, True):
+        create_knowledge_graph(sample_yaml_file, temp_dir, cache=cache, extra_formats=["png"], concurrent=concurrent)
+
+    assert drawn == [False, True]
+    assert cache.stats()["hits"] == 2
+
+def test_create_knowledge_graph_uses_render_cache(sample_yaml_file, temp_dir):
+    cache = RenderCache(Path(temp_dir) / "cache")
+    first = create_knowledge_graph(sample_yaml_file, output_dir=Path(temp_dir) / "first", cache=cache)
+    second = create_knowledge_graph(sample_yaml_file, output_dir=Path(temp_dir) / "second", cache=cache)
+
+    assert first.read_text() == second.read_text()
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+def test_pipe_backend_matches_subprocess_output(sample_yaml_file, temp_dir):
+    rendered = create_knowledge_graph(sample_yaml_file, output_dir=Path(temp_dir) / "render")
+    piped = create_knowledge_graph(sample_yaml_file, output_dir=Path(temp_dir) / "pipe", backend="pipe")
+
+    assert piped.read_bytes() == rendered.read_bytes()
+    assert not list((Path(temp_dir) / "pipe").glob("knowledge_graph"))
+
+def test_validate_graph_file_reports_all_schema_errors(temp_dir):
+    yaml_path = Path(temp_dir) / "malformed.yaml"
+    yaml_path.write_text(yaml.dump({
+        "entities": [{"id": "test1"}],
+        "relationships": [{"source": "test1", "target": "test1"}],
+    }))
+
+    errors = validate_graph_file(yaml_path)
+
+    assert errors == [
+        "entities/0: 'name' is a required property",
+        "entities/0: 'description' is a required property",
+        "relationships/0: 'name' is a required property",
+    ]
+
+def test_validate_graph_file_accepts_sample_graph(tmp_path):
+    # A copy, so nothing the validator writes can end up in the repository
+    sample = tmp_path / "sample_knowledge_graph.yaml"
+    shutil.copy(Path(__file__).parent / "sample_knowledge_graph.yaml", sample)
+    assert validate_graph_file(sample) == []
+
+def test_optimized_graphs_inlined_in_one_page_keep_their_own_styles(temp_dir, capsys):
+    pages = []
+    for name, colour in (('first', 'red'), ('second', 'blue')):
+        svg_file = Path(temp_dir) / f'{name}.svg'
+        svg_file.write_text(f'<svg xmlns="http://www.w3.org/2000/svg"><rect style="fill:{colour}"/>'
+                            f'<rect style="fill:{colour}"/></svg>')
+        html_file = knowledge_graph_visualizer._create_html(svg_file, temp_dir, name, 'inline', True)
+        pages.append(html_file.read_text())
+    page = '\n'.join(pages)
+
+    # No shared .s0 class for the second graph to redefine
+    assert 'class="s' not in page and '.s0{' not in page
+    assert page.count('style="fill:red"') == 2 and page.count('style="fill:blue"') == 2
+    assert 'first.svg' in capsys.readouterr().out
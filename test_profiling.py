@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import pstats
+import tracemalloc
+
+import pytest
+
+from course_creation_tools import profiling
+from course_creation_tools.convert_yaml_to_freeplane import converter
+
+@pytest.fixture
+def trace_file(tmp_path):
+    yield tmp_path / 'trace.json'
+    profiling.disable()
+
+def test_spans_do_nothing_when_profiling_is_off():
+    assert not profiling.is_enabled()
+    with profiling.span('stage') as span:
+        span.count(items=3)
+    assert profiling.disable() == []
+
+def test_nested_spans_are_written_as_chrome_trace_events(trace_file):
+    profiling.enable(trace_file, memory=True)
+    with profiling.span('outer', backend='pipe') as outer:
+        with profiling.span('outer.inner') as inner:
+            data = [0] * 100_000
+            inner.count(items=len(data))
+        outer.count(items=1)
+        outer.count(items=1)
+
+    assert profiling.disable() == [trace_file]
+    events = {event['name']: event for event in json.loads(trace_file.read_text())['traceEvents']}
+    assert events['outer']['ph'] == 'X'
+    assert events['outer']['cat'] == events['outer.inner']['cat'] == 'outer'
+    assert events['outer']['args']['items'] == 2
+    assert events['outer']['args']['backend'] == 'pipe'
+    assert events['outer.inner']['args']['items'] == 100_000
+    assert events['outer']['dur'] >= events['outer.inner']['dur']
+    # The list allocated in the inner span counts towards the peak of both spans
+    assert events['outer.inner']['args']['peak_memory_bytes'] >= 800_000
+    assert events['outer']['args']['peak_memory_bytes'] >= events['outer.inner']['args']['peak_memory_bytes']
+
+def test_converter_stages_are_recorded_with_node_counts(trace_file):
+    profiler = profiling.enable(trace_file)
+    converter('root:\n  title: Root\n  children:\n    a:\n      title: A\n    b:\n      title: B\n')
+
+    summary = profiler.summary()
+    assert set(summary) == {'converter', 'converter.parse_yaml', 'converter.write_mind_map'}
+    assert summary['converter.write_mind_map']['nodes'] == 3
+    assert summary['converter']['calls'] == 1
+
+def test_memory_is_only_tracked_on_request(trace_file):
+    profiler = profiling.enable(trace_file)
+    with profiling.span('stage'):
+        pass
+
+    assert not tracemalloc.is_tracing()
+    assert 'peak_memory_bytes' not in profiler.summary()['stage']
+    profiling.disable()
+    [event] = json.loads(trace_file.read_text())['traceEvents']
+    assert 'peak_memory_bytes' not in event['args']
+
+def test_pool_workers_send_their_spans_back(trace_file):
+    profiler = profiling.enable(trace_file, cprofile_stages=['converter'])
+    outline = 'root:\n  title: Root\n  children:\n    a:\n      title: A\n'
+
+    with profiling.pool_executor(2) as executor:
+        assert isinstance(executor, profiling._ProfiledPoolExecutor)
+        futures = [executor.submit(converter, outline) for _ in range(4)]
+        assert all('TEXT="A"' in future.result() for future in futures)
+        failed = executor.submit(converter, 'root: [unclosed\n')
+        with pytest.raises(Exception):
+            failed.result()
+
+    written_maps = profiler.summary()['converter.write_mind_map']
+    assert (written_maps['calls'], written_maps['nodes']) == (4, 8)
+    written = profiling.disable()
+    events = json.loads(trace_file.read_text())['traceEvents']
+    assert {event['pid'] for event in events} - {os.getpid()}
+    assert sum(event['name'] == 'converter' for event in events) == 5
+    worker_profiles = [path for path in written if path.name.startswith('trace.converter.')]
+    assert worker_profiles and all(pstats.Stats(str(path)).total_calls > 0 for path in worker_profiles)
+
+def test_cprofile_stage_is_written_next_to_the_trace(trace_file):
+    profiling.enable(trace_file, cprofile_stages=['converter'])
+    converter('root:\n  title: Root\n')
+
+    written = profiling.disable()
+    assert written == [trace_file, trace_file.with_name('trace.converter.prof')]
+    assert pstats.Stats(str(written[1])).total_calls > 0
+
+def test_environment_variable_enables_profiling(trace_file, monkeypatch):
+    monkeypatch.setenv(profiling.ENV_VAR, str(trace_file))
+    monkeypatch.setenv(profiling.STAGES_ENV_VAR, 'converter')
+
+    profiler = profiling.configure()
+
+    assert profiling.is_enabled()
+    assert profiler.output_file == trace_file
+    assert profiler.cprofile_stages == {'converter'}
+    assert not profiler.memory
+
+def test_profile_memory_flag_turns_on_memory_tracking(trace_file):
+    parser = argparse.ArgumentParser()
+    profiling.add_arguments(parser)
+
+    profiler = profiling.configure(parser.parse_args(['--profile', str(trace_file), '--profile-memory']))
+
+    assert profiler.memory and tracemalloc.is_tracing()
@@ -0,0 +1,51 @@
+import os
+import pytest
+import tempfile
+from pathlib import Path
+from course_creation_tools import render_cache
+from course_creation_tools.render_cache import RenderCache
+
+@pytest.fixture
+def temp_dir():
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield Path(tmpdirname)
+
+def test_fetch_counts_hits_and_misses(temp_dir):
+    cache = RenderCache(temp_dir / "cache")
+    rendered = temp_dir / "graph.svg"
+    rendered.write_text("<svg/>")
+    destination = temp_dir / "copy.svg"
+
+    assert not cache.fetch("abc", "svg", destination)
+    cache.store("abc", "svg", rendered)
+    assert cache.fetch("abc", "svg", destination)
+
+    assert destination.read_text() == "<svg/>"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+def test_counters_persist_across_instances(temp_dir):
+    RenderCache(temp_dir).fetch("missing", "svg", temp_dir / "out.svg")
+    assert RenderCache(temp_dir).stats()["misses"] == 1
+
+def test_evicts_least_recently_used(temp_dir):
+    cache = RenderCache(temp_dir / "cache", max_bytes=25)
+    rendered = temp_dir / "graph.svg"
+    rendered.write_text("x" * 10)
+    cache.store("old", "svg", rendered)
+    cache.store("used", "svg", rendered)
+    os.utime(temp_dir / "cache" / "old.svg", (0, 0))
+    os.utime(temp_dir / "cache" / "used.svg", (100, 100))
+
+    cache.store("new", "svg", rendered)
+
+    names = sorted(path.name for path in cache.entries())
+    assert names == ["new.svg", "used.svg"]
+
+def test_key_depends_on_backend_and_graphviz_build(temp_dir, monkeypatch):
+    cache = RenderCache(temp_dir)
+    key = cache.key("digraph {}", "svg")
+
+    assert cache.key("digraph {}", "svg", backend="pygraphviz") != key
+    monkeypatch.setattr(render_cache, "graphviz_version", lambda: "dot - graphviz version 2.43.0 (20240101.0000)")
+    assert cache.key("digraph {}", "svg") != key
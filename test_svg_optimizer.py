@@ -0,0 +1,72 @@
+import gzip
+import tempfile
+from pathlib import Path
+from course_creation_tools.svg_optimizer import optimize_svg, optimize_svg_file
+
+SVG = """<?xml version="1.0" encoding="UTF-8" standalone="no"?>
+<!-- Created with Inkscape (http://www.inkscape.org/) -->
+<svg width="361.24442mm" viewBox="0 0 361.24442 206.02223" id="svg2237"
+   xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape"
+   xmlns:sodipodi="http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd"
+   xmlns="http://www.w3.org/2000/svg">
+  <sodipodi:namedview id="namedview2239" inkscape:zoom="0.75098906" />
+  <metadata id="metadata1">editor data</metadata>
+  <g inkscape:label="Layer 1" id="layer1">
+    <path id="sfg" style="fill:#ff0000;opacity:0.5" sodipodi:type="arc" d="m 66.054363,52.750046 l 1.0000001,2" />
+    <path id="path2" style="fill:#ff0000;opacity:0.5" d="M 0,0 L 1,1" />
+    <text id="sfg-text" xml:space="preserve"><tspan id="tspan45611">Superior Frontal Gyrus</tspan></text>
+  </g>
+</svg>
+"""
+
+def test_optimize_svg_strips_editor_data_and_keeps_animation_ids():
+    optimized = optimize_svg(SVG)
+
+    assert "Inkscape" not in optimized and "inkscape" not in optimized
+    assert "sodipodi" not in optimized and "metadata" not in optimized
+    assert 'id="sfg"' in optimized and 'id="sfg-text"' in optimized
+    assert 'id="path2"' not in optimized and 'id="layer1"' not in optimized
+    assert 'd="m 66.054,52.75 l 1,2"' in optimized
+    assert 'viewBox="0 0 361.244 206.022"' in optimized
+    assert ">Superior Frontal Gyrus</tspan>" in optimized
+
+def test_optimize_svg_merges_repeated_styles_into_classes():
+    optimized = optimize_svg(SVG)
+
+    assert "<style>.s0{fill:#ff0000;opacity:0.5}</style>" in optimized
+    assert optimized.count('class="s0"') == 2
+    assert "style=" not in optimized
+
+def test_optimize_svg_file_reports_sizes_and_gzips():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        svg_file = Path(temp_dir) / "brain.svg"
+        svg_file.write_text(SVG)
+
+        report = optimize_svg_file(svg_file, Path(temp_dir) / "out" / "brain.svg", gzip_output=True)
+
+        assert report["before"] == len(SVG.encode("utf-8"))
+        assert report["after"] < report["before"]
+        svgz = Path(temp_dir) / "out" / "brain.svgz"
+        assert len(gzip.decompress(svgz.read_bytes())) == report["after"]
+
+def test_optimize_svg_keeps_ids_used_by_style_selectors():
+    optimized = optimize_svg('<svg xmlns="http://www.w3.org/2000/svg"><style>#hl{fill:#ff0000} g > #b:hover{opacity:1}'
+                             '</style><rect id="hl"/><rect id="b"/><rect id="ff0000"/></svg>')
+
+    assert '<rect id="hl" />' in optimized and '<rect id="b" />' in optimized
+    assert 'id="ff0000"' not in optimized
+
+def test_optimize_svg_keeps_compact_path_numbers_apart():
+    optimized = optimize_svg('<svg xmlns="http://www.w3.org/2000/svg"><path d="M0.0001.5L1.00001.25-.5"/></svg>')
+
+    assert 'd="M0 0.5L1 0.25-0.5"' in optimized
+
+def test_optimize_svg_writes_xlink_prefix_without_registering_namespaces():
+    from xml.etree import ElementTree
+    registered = dict(ElementTree._namespace_map)
+    optimized = optimize_svg('<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">'
+                             '<rect id="r"/><use xlink:href="#r"/></svg>')
+
+    assert optimized.startswith('<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">')
+    assert '<use xlink:href="#r" />' in optimized
+    assert ElementTree._namespace_map == registered
@@ -0,0 +1,104 @@
+import os
+import pickle
+import sys
+
+import pytest
+import yaml
+
+from course_creation_tools import yaml_cache
+
+@pytest.fixture
+def outline(tmp_path):
+    path = tmp_path / 'outline.yaml'
+    path.write_text('root:\n  title: Course\n')
+    return path
+
+def fail_to_parse(*args, **kwargs):
+    raise AssertionError('the YAML should not have been parsed')
+
+def test_unchanged_file_is_loaded_without_parsing(outline, monkeypatch):
+    assert yaml_cache.load(outline) == {'root': {'title': 'Course'}}
+    assert yaml_cache.cache_file(outline).exists()
+    assert list(outline.parent.iterdir()) == [outline]
+
+    monkeypatch.setattr(yaml_cache.yaml, 'load', fail_to_parse)
+    assert yaml_cache.load(outline) == {'root': {'title': 'Course'}}
+
+def test_edited_file_is_parsed_again(outline):
+    yaml_cache.load(outline)
+    outline.write_text('root:\n  title: Edited course\n')
+    os.utime(outline, ns=(0, 0))  # even with an older timestamp
+
+    assert yaml_cache.load(outline) == {'root': {'title': 'Edited course'}}
+
+def test_touched_file_with_the_same_content_reuses_the_cache(outline, monkeypatch):
+    yaml_cache.load(outline)
+    os.utime(outline, ns=(0, 0))
+    monkeypatch.setattr(yaml_cache.yaml, 'load', fail_to_parse)
+
+    assert yaml_cache.load(outline) == {'root': {'title': 'Course'}}
+    with open(yaml_cache.cache_file(outline), 'rb') as f:
+        assert pickle.load(f)['mtime_ns'] == 0
+
+def test_damaged_or_old_cache_files_are_ignored(outline):
+    cache = yaml_cache.cache_file(outline)
+    cache.write_bytes(b'not a pickle')
+    assert yaml_cache.load(outline) == {'root': {'title': 'Course'}}
+
+    with open(cache, 'wb') as f:
+        pickle.dump({'version': 0}, f)
+    assert yaml_cache.load(outline) == {'root': {'title': 'Course'}}
+
+def test_pickles_next_to_the_yaml_are_never_loaded(outline, tmp_path):
+    class Planted:
+        def __reduce__(self):
+            return (os.system, (f'touch {tmp_path / "pwned"}',))
+
+    for name in ('.outline.yaml.pickle', 'outline.yaml.pickle'):
+        with open(tmp_path / name, 'wb') as f:
+            pickle.dump(Planted(), f)
+
+    assert yaml_cache.load(outline) == {'root': {'title': 'Course'}}
+    assert not (tmp_path / 'pwned').exists()
+
+def test_cache_directory_writable_by_others_is_not_used(outline, yaml_cache_dir, monkeypatch):
+    yaml_cache_dir.chmod(0o777)
+    monkeypatch.setattr(yaml_cache, '_read_header', fail_to_parse)
+
+    assert yaml_cache.load(outline) == {'root': {'title': 'Course'}}
+    assert not yaml_cache.cache_file(outline).exists()
+
+def test_entries_are_keyed_by_resolved_path(tmp_path):
+    for name in ('a', 'b'):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / 'outline.yaml').write_text(f'root:\n  title: {name}\n')
+
+    assert yaml_cache.load(tmp_path / 'a' / 'outline.yaml') == {'root': {'title': 'a'}}
+    assert yaml_cache.load(tmp_path / 'b' / 'outline.yaml') == {'root': {'title': 'b'}}
+    assert yaml_cache.cache_file(tmp_path / 'a' / '..' / 'a' / 'outline.yaml') == \
+        yaml_cache.cache_file(tmp_path / 'a' / 'outline.yaml')
+
+def test_data_too_deep_to_pickle_is_returned_uncached(tmp_path):
+    depth = sys.getrecursionlimit() + 500
+    deep = tmp_path / 'deep.yaml'
+    deep.write_text('root: ' + '[' * depth + ']' * depth + '\n')
+
+    data, levels = yaml_cache.load(deep)['root'], 0
+    while data:
+        data, levels = data[0], levels + 1
+    assert levels == depth - 1
+    assert not yaml_cache.cache_file(deep).exists()
+
+def test_invalid_yaml_is_not_cached(tmp_path):
+    broken = tmp_path / 'broken.yaml'
+    broken.write_text('root: [unclosed\n')
+
+    with pytest.raises(yaml.YAMLError):
+        yaml_cache.load(broken)
+    assert not yaml_cache.cache_file(broken).exists()
+
+def test_cache_can_be_switched_off(outline, monkeypatch):
+    monkeypatch.setenv(yaml_cache.ENV_VAR, '0')
+
+    assert yaml_cache.load(outline) == {'root': {'title': 'Course'}}
+    assert not yaml_cache.cache_file(outline).exists()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Make the brain_animation scripts (browser_pool, capture_animation) importable from the tests
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'brain_animation'))
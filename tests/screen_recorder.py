@@ -1,69 +1,162 @@
 import os
+import shutil
 import subprocess
+import threading
 import time
 from datetime import datetime
 
+# ffmpeg prints this once the input is open and frames are being encoded
+READY_SIGNAL = 'Press [q] to stop'
+
+class VirtualDisplay:
+    """An Xvfb display for machines without a screen, such as CI runners.
+
+    Start it before the browser so the browser window opens on it. Does nothing when
+    a DISPLAY is already set, so tests still record the real screen on a desktop.
+    """
+
+    def __init__(self, width=1920, height=1080, display=99):
+        self.size = f"{width}x{height}x24"
+        self.display = display
+        self.process = None
+        self.previous = None
+
+    def start(self):
+        if os.environ.get('DISPLAY'):
+            return self
+        if shutil.which('Xvfb') is None:
+            raise RuntimeError("No DISPLAY is set and Xvfb is not installed")
+        while os.path.exists(f"/tmp/.X11-unix/X{self.display}"):
+            self.display += 1
+        self.process = subprocess.Popen(
+            ['Xvfb', f':{self.display}', '-screen', '0', self.size, '-nolisten', 'tcp'],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        # The display is ready once Xvfb has created its socket
+        deadline = time.monotonic() + 10
+        while not os.path.exists(f"/tmp/.X11-unix/X{self.display}"):
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                self.stop()
+                raise RuntimeError(f"Xvfb could not start display :{self.display}")
+            time.sleep(0.05)
+        self.previous = os.environ.get('DISPLAY')
+        os.environ['DISPLAY'] = f':{self.display}'
+        print(f"\nStarted virtual display :{self.display}")
+        return self
+
+    def stop(self):
+        if self.process:
+            self.process.terminate()
+            self.process.wait()
+            self.process = None
+            if self.previous is None:
+                os.environ.pop('DISPLAY', None)
+            else:
+                os.environ['DISPLAY'] = self.previous
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
 class ScreenRecorder:
-    def __init__(self, output_dir="../recordings"):
+    def __init__(self, output_dir="../recordings", framerate=30, start_timeout=10):
         self.output_dir = os.path.abspath(output_dir)
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
+        self.framerate = framerate
+        self.start_timeout = start_timeout
         self.process = None
+        self.ready = threading.Event()
+        self.log = []
         print(f"\nScreen recorder initialized. Output directory: {self.output_dir}")
-        
+
+    @staticmethod
+    def window_region(driver):
+        """Return (x, y, width, height) of the browser window, with even sizes as libx264 needs."""
+        rect = driver.get_window_rect()
+        x, y = max(int(rect['x']), 0), max(int(rect['y']), 0)
+        return x, y, int(rect['width']) // 2 * 2, int(rect['height']) // 2 * 2
+
+    def _read_log(self):
+        # Keep reading so ffmpeg never blocks on a full stderr pipe
+        for line in iter(self.process.stderr.readline, b''):
+            line = line.decode(errors='replace')
+            self.log.append(line)
+            if READY_SIGNAL in line:
+                self.ready.set()
+        self.ready.set()  # ffmpeg exited; start() checks why
+
     def start(self, driver):
-        """Start recording the screen using ffmpeg.
+        """Start recording the browser window using ffmpeg.
         Args:
             driver: Selenium WebDriver instance to get window position and size
         """
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_file = os.path.join(self.output_dir, f"demo_{timestamp}.mp4")
-            
-            # FFmpeg command to record screen
+            x, y, width, height = self.window_region(driver)
+            display = os.environ.get('DISPLAY', ':0.0')
+
+            # FFmpeg command to record the window region of the screen
             command = [
                 'ffmpeg',
+                '-nostats',  # no progress lines on stderr, just the messages we wait for
                 '-f', 'x11grab',  # X11 display grabber
-                '-video_size', '1920x1080',  # capture full HD screen
-                '-framerate', '30',
-                '-i', ':0.0',  # capture entire screen
+                '-video_size', f'{width}x{height}',  # capture only the browser window
+                '-framerate', str(self.framerate),
+                '-i', f'{display}+{x},{y}',
                 '-c:v', 'libx264',
                 '-preset', 'ultrafast',
+                '-pix_fmt', 'yuv420p',
                 '-y',  # overwrite output file if exists
                 output_file
             ]
-            
+
             print(f"\nStarting screen recording...")
             print(f"Command: {' '.join(command)}")
             print(f"Output file: {output_file}")
-            
+
+            self.ready.clear()
+            self.log = []
             self.process = subprocess.Popen(
                 command,
-                stdout=subprocess.PIPE,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE
             )
             self.output_file = output_file
-            
-            # Check if process started successfully
-            time.sleep(1)
-            if self.process.poll() is not None:
-                stdout, stderr = self.process.communicate()
-                print(f"\nError starting screen recording: {stderr.decode()}")
+            threading.Thread(target=self._read_log, daemon=True).start()
+
+            # Wait until ffmpeg says it is recording, not a fixed time
+            if not self.ready.wait(self.start_timeout) or self.process.poll() is not None:
+                print(f"\nError starting screen recording: {''.join(self.log)}")
                 raise Exception("Failed to start screen recording")
-                
+
             print("Screen recording started successfully")
-            
+
         except Exception as e:
             print(f"\nError starting screen recording: {str(e)}")
             if hasattr(self, 'process') and self.process:
-                self.process.terminate()
+                self.process.kill()
+                self.process.wait()
+                self.process = None
             raise
-    
-    def stop(self):
-        """Stop the screen recording."""
+
+    def stop(self, timeout=10):
+        """Stop the screen recording, letting ffmpeg finish writing the MP4 file."""
         if self.process:
             print("\nStopping screen recording...")
-            self.process.terminate()
-            self.process.wait()
+            try:
+                # 'q' makes ffmpeg stop reading input and write the MP4 index before exiting
+                self.process.stdin.write(b'q')
+                self.process.stdin.close()
+                self.process.wait(timeout)
+            except (BrokenPipeError, subprocess.TimeoutExpired):
+                self.process.terminate()
+                self.process.wait()
             print(f"Screen recording saved to: {self.output_file}")
-            self.process = None
\ No newline at end of file
+            self.process = None
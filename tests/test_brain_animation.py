@@ -6,38 +6,48 @@ from selenium.webdriver.firefox.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from screen_recorder import ScreenRecorder
+from screen_recorder import ScreenRecorder, VirtualDisplay
+from browser_pool import BrowserPool
 import time
 from datetime import datetime
 
-@pytest.fixture
-def firefox_driver():
+def start_firefox():
     firefox_options = Options()
     firefox_options.add_argument('--width=1024')
     firefox_options.add_argument('--height=600')
     
     driver = webdriver.Firefox(options=firefox_options)
     driver.maximize_window()
-    
-    yield driver
-    driver.quit()
+    return driver
+
+@pytest.fixture(scope='session')
+def virtual_display():
+    # Headless CI runners have no X server; the browser and ffmpeg share an Xvfb display
+    with VirtualDisplay() as display:
+        yield display
+
+@pytest.fixture(scope='session')
+def browser_pool(virtual_display):
+    # Firefox is started once for the whole test run and reset between tests
+    with BrowserPool(start_firefox, size=1) as pool:
+        yield pool
+
+@pytest.fixture
+def firefox_driver(browser_pool):
+    with browser_pool.session() as driver:
+        yield driver
 
 @pytest.fixture
 def screen_recorder(firefox_driver):
-    # Load page and wait for ready indicator
-    firefox_driver.get('http://localhost:8000')
-    wait = WebDriverWait(firefox_driver, 10)
-    # ready_element = wait.until(
-    #     EC.presence_of_element_located((By.CSS_SELECTOR, "#ready-indicator[style*='visibility: visible']"))
-    # )
-    
-    # Now start recording
+    # Start recording first so the whole animation is on the video
     output_dir = 'recordings'
     recorder = ScreenRecorder(output_dir)
     recorder.start(firefox_driver)
+    firefox_driver.get('http://localhost:8000')
     yield recorder
     recorder.stop()
 
 def test_brain_animation(firefox_driver, screen_recorder):
-    # Wait for the full animation duration (2s delay + 5s fade + 1s buffer)
-    time.sleep(8)
+    # The page marks the body once the 5s fade has finished and the label is shown
+    WebDriverWait(firefox_driver, 15).until(
+        lambda driver: driver.execute_script("return document.body.dataset.animationComplete === 'true'"))
@@ -0,0 +1,100 @@
+import pytest
+import threading
+from browser_pool import BLANK_PAGE, BrowserPool
+
+class FakeDriver:
+    started = 0
+
+    def __init__(self):
+        FakeDriver.started += 1
+        self.crashed = False
+        self.quit_called = False
+        self.pages = []
+
+    def execute_script(self, script):
+        if self.crashed:
+            raise ConnectionError('browser is gone')
+        return 1
+
+    def get(self, url):
+        if self.crashed:
+            raise ConnectionError('browser is gone')
+        self.pages.append(url)
+
+    def delete_all_cookies(self):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+@pytest.fixture
+def pool():
+    FakeDriver.started = 0
+    with BrowserPool(FakeDriver, size=2, max_uses=3, timeout=0.3) as pool:
+        yield pool
+
+def test_sessions_are_reused_and_reset(pool):
+    with pool.session() as driver:
+        driver.get('http://localhost:8000')
+    with pool.session() as again:
+        pass
+
+    assert again is driver
+    assert driver.pages == ['http://localhost:8000', BLANK_PAGE, BLANK_PAGE]
+    assert FakeDriver.started == 1
+
+def test_crashed_sessions_are_replaced(pool):
+    with pool.session() as driver:
+        pass
+    driver.crashed = True
+
+    with pool.session() as replacement:
+        pass
+
+    assert replacement is not driver
+    assert driver.quit_called
+    assert pool.open == 1
+
+def test_worn_out_sessions_are_retired(pool):
+    drivers = []
+    for _ in range(4):
+        with pool.session() as driver:
+            drivers.append(driver)
+
+    assert drivers[:3] == [drivers[0]] * 3
+    assert drivers[3] is not drivers[0] and drivers[0].quit_called
+
+def test_pool_size_is_a_limit(pool):
+    first, second = pool.acquire(), pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    pool.release(second)
+
+def test_close_quits_idle_sessions(pool):
+    with pool.session() as driver:
+        pass
+    pool.close()
+
+    assert driver.quit_called
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+def test_sessions_shared_between_threads_still_wear_out(pool):
+    borrowed = []
+
+    def capture():
+        for _ in range(20):
+            with pool.session() as driver:
+                borrowed.append(driver)
+
+    threads = [threading.Thread(target=capture) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(borrowed) == 80
+    assert max(borrowed.count(driver) for driver in borrowed) <= pool.max_uses
+    assert pool.open <= pool.size
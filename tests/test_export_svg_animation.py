@@ -0,0 +1,41 @@
+import re
+from xml.etree import ElementTree
+import pytest
+from export_svg_animation import ANIMATIONS, SVG_NS, XLINK_NS, compile_animation, export_animations, keyframes_css
+
+def test_keyframes_follow_the_steps():
+    css = keyframes_css(ANIMATIONS['brain-animation']['steps'])
+
+    assert '@keyframes step0-sfg{from{opacity:0}to{opacity:0.5}}' in css
+    assert '#sfg{animation:step0-sfg 5s linear 0s 1 both}' in css
+    # The label switches on instantly once the fade has finished
+    assert '#sfg-text{animation:step1-sfg-text 0s linear 5s 1 both}' in css
+
+def test_exported_svg_is_standalone(tmp_path):
+    [output_file] = export_animations(tmp_path)
+    root = ElementTree.parse(output_file).getroot()
+
+    assert root.find(f'{{{SVG_NS}}}style') is not None
+    assert root.find(f'.//{{{SVG_NS}}}script') is None
+    for image in root.iter(f'{{{SVG_NS}}}image'):
+        assert image.get(f'{{{XLINK_NS}}}href').startswith('data:image/png;base64,')
+
+def test_linked_images_are_kept_when_not_embedding():
+    svg = compile_animation(ANIMATIONS['brain-animation'], embed=False)
+
+    assert re.search(r'href="brain-en-49bacc-1024-edited.png"', svg)
+
+def test_missing_element_is_an_error():
+    definition = dict(ANIMATIONS['brain-animation'], steps=[{'id': 'nope', 'from': 0, 'to': 1, 'start': 0, 'end': 1}])
+
+    with pytest.raises(ValueError, match='nope'):
+        compile_animation(definition)
+
+def test_exporting_leaves_elementtree_namespaces_alone():
+    registered = dict(ElementTree._namespace_map)
+
+    svg = compile_animation(ANIMATIONS['brain-animation'], embed=False)
+
+    assert ElementTree._namespace_map == registered
+    assert '<svg xmlns="http://www.w3.org/2000/svg"' in svg
+    assert 'xmlns:xlink="http://www.w3.org/1999/xlink"' in svg and 'ns0:' not in svg